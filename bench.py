@@ -0,0 +1,367 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from tracing import peak_rss_mb
+
+# BENCHMARKS
+#
+# `python bench.py` generates synthetic seasons at 1x, 10x and 100x the size
+# of a real one under BENCH_DIR, runs every pipeline stage against each in
+# its own fresh process (so timings are cold and peak memory is per stage)
+# and prints wall time (best of REPEAT runs), peak RSS and rows/sec as JSON.
+# `--save-baseline` stores the results in BASELINE_FILE; later runs report
+# every stage's time relative to it and exit non-zero when one is more than
+# TOLERANCE slower.
+
+BENCH_DIR = "bench_data"
+BASELINE_FILE = "bench_baseline.json"
+RESULTS_FILE = "bench_results.json"
+SCALES = [1, 10, 100]
+TOLERANCE = 0.2
+# stages faster than this are all noise, so they never count as regressions
+MIN_REGRESSION_S = 0.05
+REPEAT = 3
+SEED = 0
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# a 1x season: every team plays about every other day, ROSTER_SIZE players each
+SEASON_DAYS = 170
+ROSTER_SIZE = 15
+POSITIONS = np.array(["G", "G-F", "F", "F-C", "C"])
+STAT_RANGES = {
+    'points': 40, 'assists': 12, 'blocks': 4, 'steals': 4, 'reboundsTotal': 15,
+    'turnovers': 6, 'threePointersMade': 5,
+}
+
+# ----------------
+# SYNTHETIC SEASON
+# ----------------
+
+def generate_season(out_dir, scale, seed=SEED):
+    """Write a self-contained dataset + working directory for one scale.
+
+    Same files and columns the pipeline reads from the Kaggle dataset
+    (PlayerStatistics.csv, Players.csv, LeagueSchedule24_25.csv) plus the
+    repo's own inputs (injury_data.csv, teams.json and the registry's current model).
+    Game days run up to yesterday so every "last N days" window has data.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with open(os.path.join(REPO_DIR, "teams.json"), "r") as f:
+        teams = json.load(f)
+    team_ids = np.array([t["teamId"] for t in teams])
+    team_names = np.array([t["simpleName"] for t in teams])
+    full_names = {t["simpleName"]: t["teamName"] for t in teams}
+    n_teams = len(teams)
+    roster = ROSTER_SIZE * scale
+
+    # pair teams off at random every day; each pairing plays half the time
+    today = pd.Timestamp.today().normalize()
+    days = pd.date_range(today - pd.Timedelta(days=SEASON_DAYS), periods=SEASON_DAYS)
+    order = np.argsort(rng.random((len(days), n_teams)), axis=1)
+    plays = rng.random((len(days), n_teams // 2)) < 0.5
+    day_idx, slot = np.nonzero(plays)
+    home, away = order[day_idx, 2 * slot], order[day_idx, 2 * slot + 1]
+    tipoff = days[day_idx] + pd.Timedelta(hours=19, minutes=30)
+    game_ids = np.arange(len(day_idx)) + 1
+
+    # one row per player on each side of each game
+    team = np.concatenate([home, away])
+    opponent = np.concatenate([away, home])
+    is_home = np.concatenate([np.ones(len(home), int), np.zeros(len(away), int)])
+    side = np.tile(np.arange(len(home)), 2)
+    rows = np.repeat(np.arange(len(team)), roster)
+    player = team[rows] * roster + np.tile(np.arange(roster), len(team))
+    n = len(rows)
+
+    fga = rng.integers(0, 25, n)
+    fta = rng.integers(0, 10, n)
+    stats = {
+        'fieldGoalsAttempted': fga,
+        'fieldGoalsMade': (rng.random(n) * (fga + 1)).astype(int),
+        'freeThrowsAttempted': fta,
+        'freeThrowsMade': (rng.random(n) * (fta + 1)).astype(int),
+        **{col: rng.integers(0, high, n) for col, high in STAT_RANGES.items()},
+    }
+    minutes = np.where(rng.random(n) < 0.1, 0.0, np.clip(rng.normal(25, 10, n), 0, 48).round(2))
+    win = rng.random(len(home)) < 0.5
+
+    nba = pd.DataFrame({
+        'firstName': pd.Series(player).map("First{}".format),
+        'lastName': pd.Series(player).map("Last{}".format),
+        'personId': player + 1_000_000,
+        'gameId': game_ids[side[rows]],
+        'gameDate': tipoff[side[rows]].strftime('%Y-%m-%d %H:%M:%S'),
+        'playerteamCity': 'City',
+        'playerteamName': team_names[team[rows]],
+        'opponentteamCity': 'City',
+        'opponentteamName': team_names[opponent[rows]],
+        'gameType': 'Regular Season',
+        'win': np.where(is_home[rows] == 1, win[side[rows]], ~win[side[rows]]).astype(int),
+        'home': is_home[rows],
+        'numMinutes': minutes,
+        **{col: values.astype(float) for col, values in stats.items()},
+    })
+    # half the DNPs come through with no stats at all, as in the real data
+    dnp = (minutes == 0) & (rng.random(n) < 0.5)
+    nba.loc[dnp, list(stats) + ['numMinutes']] = np.nan
+    nba.iloc[::-1].to_csv(os.path.join(out_dir, "PlayerStatistics.csv"), index=False)
+
+    n_players = n_teams * roster
+    positions = POSITIONS[rng.integers(0, len(POSITIONS), n_players)]
+    pd.DataFrame({
+        'personId': np.arange(n_players) + 1_000_000,
+        'firstName': [f"First{i}" for i in range(n_players)],
+        'lastName': [f"Last{i}" for i in range(n_players)],
+        'guard': np.char.find(positions, "G") >= 0,
+        'forward': np.char.find(positions, "F") >= 0,
+        'center': np.char.find(positions, "C") >= 0,
+    }).to_csv(os.path.join(out_dir, "Players.csv"), index=False)
+
+    injured = nba[~dnp].sample(frac=0.02, random_state=seed)
+    pd.DataFrame({
+        'PLAYER': injured['lastName'] + ', ' + injured['firstName'],
+        'STATUS': 'Out', 'REASON': 'Injury/Illness',
+        # the real report names teams in full ("New York Knicks"), not as the box scores do
+        'TEAM': injured['playerteamName'].map(full_names),
+        'GAME': '',
+        'DATE': pd.to_datetime(injured['gameDate']).dt.strftime('%m/%d/%Y'),
+    }).to_csv(os.path.join(out_dir, "injury_data.csv"), index=False)
+
+    # the season so far, the predictor's hard-coded day and the coming week
+    extra_days = pd.DatetimeIndex([pd.Timestamp(2025, 4, 13)]).append(pd.date_range(today, periods=7))
+    extra_order = np.argsort(rng.random((len(extra_days), n_teams)), axis=1)
+    schedule = pd.DataFrame({
+        'gameId': np.concatenate([game_ids, len(game_ids) + 1 + np.arange(len(extra_days) * (n_teams // 2))]),
+        'gameDateTimeEst': np.concatenate([
+            tipoff, np.repeat(extra_days + pd.Timedelta(hours=19, minutes=30), n_teams // 2)
+        ]).astype('datetime64[s]').astype(str),
+        'hometeamId': np.concatenate([team_ids[home], team_ids[extra_order[:, 0::2].ravel()]]),
+        'awayteamId': np.concatenate([team_ids[away], team_ids[extra_order[:, 1::2].ravel()]]),
+    })
+    schedule['gameDateTimeEst'] = schedule['gameDateTimeEst'] + 'Z'
+    schedule.to_csv(os.path.join(out_dir, "LeagueSchedule24_25.csv"), index=False)
+
+    with open(os.path.join(out_dir, "teams.json"), "w") as f:
+        json.dump(teams, f)
+    models = os.path.join(out_dir, "models")
+    if not os.path.lexists(models):
+        os.symlink(os.path.join(REPO_DIR, "models"), models)
+
+    info = {"scale": scale, "seed": seed, "rows": n, "generated_on": today.date().isoformat()}
+    with open(os.path.join(out_dir, "_generated.json"), "w") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+def ensure_season(scale, seed=SEED, bench_dir=BENCH_DIR):
+    """Reuse today's generated data for this scale and seed, otherwise regenerate."""
+    out_dir = os.path.abspath(os.path.join(bench_dir, f"{scale}x"))
+    try:
+        with open(os.path.join(out_dir, "_generated.json"), "r") as f:
+            info = json.load(f)
+        if (info["scale"], info["seed"], info["generated_on"]) == (scale, seed, datetime.today().date().isoformat()):
+            return out_dir, info
+    except (OSError, ValueError, KeyError):
+        pass
+    print(f"Generating {scale}x synthetic season → {out_dir}", file=sys.stderr)
+    return out_dir, generate_season(out_dir, scale, seed)
+
+# ------
+# STAGES
+# ------
+#
+# Each stage runs in the data directory and returns (run, rows): setup
+# happens before the timer starts, run() is the part being measured, and
+# rows is what it works through (box-score rows for the data stages, model
+# rows for the predictor and plot, callback calls for the dashboard).
+# Stages run in this order and each may rely on the files earlier ones wrote.
+
+def _dataset_rows():
+    with open("_generated.json", "r") as f:
+        return json.load(f)["rows"]
+
+def stage_csv_load():
+    from box_scores import build_store, load_box_scores, stats_csv
+    def run():
+        build_store(stats_csv())
+        load_box_scores()
+    return run, _dataset_rows()
+
+def stage_fp_scoring():
+    from box_scores import load_box_scores
+    from scoring import STAT_COLUMNS, add_fantasy_points
+    nba = load_box_scores(columns=STAT_COLUMNS)
+    return (lambda: add_fantasy_points(nba)), len(nba)
+
+def stage_build_cache():
+    import runpy
+    return (lambda: runpy.run_path(os.path.join(REPO_DIR, "build_cache.py"), run_name="__main__")), _dataset_rows()
+
+def stage_oss():
+    from oss import build_oss_cache
+    return build_oss_cache, _dataset_rows()
+
+def stage_process_model_data():
+    from process_model_data import build_full
+    return build_full, _dataset_rows()
+
+def stage_predictions():
+    from predictor import get_tomorrows_predictions, TRAINING_DATA
+    return get_tomorrows_predictions, len(pd.read_csv(TRAINING_DATA, usecols=['fp']))
+
+def stage_pred_vs_actual_plot():
+    from registry import current_evaluation
+    from plots import create_pred_vs_actual_plot
+    # the evaluation is stored at promotion; the plot only reads it back
+    return create_pred_vs_actual_plot, len(current_evaluation()["actual"])
+
+def stage_update_top_performers():
+    from snapshot import build_snapshot, SNAPSHOT_FILE
+    build_snapshot(SNAPSHOT_FILE)
+    import dashboard
+    from dash._callback_context import context_value
+    from dash._utils import AttributeDict
+
+    buttons = ["btn-all", "btn-guard", "btn-forward", "btn-center"]
+    def run():
+        dashboard.render_cache.clear()
+        for button in buttons:
+            # what Dash sets up around a real button click
+            context_value.set(AttributeDict(triggered_inputs=[{"prop_id": f"{button}.n_clicks", "value": 1}]))
+            dashboard.update_top_performers(1, 1, 1, 1)
+    return run, len(buttons)
+
+STAGES = {
+    "csv_load": stage_csv_load,
+    "fp_scoring": stage_fp_scoring,
+    "build_cache": stage_build_cache,
+    "oss": stage_oss,
+    "process_model_data": stage_process_model_data,
+    "get_tomorrows_predictions": stage_predictions,
+    "create_pred_vs_actual_plot": stage_pred_vs_actual_plot,
+    "update_top_performers": stage_update_top_performers,
+}
+
+def run_stage(name):
+    """Run one stage in this process and return its measurements."""
+    # stage output goes to stderr so stdout carries only the result
+    with contextlib.redirect_stdout(sys.stderr):
+        run, rows = STAGES[name]()
+        setup_mb = peak_rss_mb()
+        start = time.perf_counter()
+        run()
+        wall = time.perf_counter() - start
+    return {
+        "wall_s": round(wall, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "setup_rss_mb": round(setup_mb, 1),
+        "rows": rows,
+        "rows_per_s": round(rows / wall, 1) if wall > 0 else None,
+    }
+
+def run_scale(scale, stages, seed=SEED, repeat=REPEAT):
+    """Run every stage `repeat` times, each in a fresh process; keep the fastest run."""
+    data_dir, info = ensure_season(scale, seed)
+    env = dict(os.environ, BOXOUT_DATASET_DIR=data_dir, MLFLOW_DISABLE_AGENT_HINT="1")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")]))
+
+    results = {}
+    for name in stages:
+        runs = []
+        for _ in range(repeat):
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--stage", name],
+                cwd=data_dir, env=env, capture_output=True, text=True
+            )
+            if proc.returncode != 0:
+                print(proc.stderr, file=sys.stderr)
+                lines = proc.stderr.strip().splitlines()
+                runs = [{"error": lines[-1] if lines else "failed"}]
+                break
+            runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+        if "error" in runs[0]:
+            results[name] = runs[0]
+            print(f"{scale}x {name}: failed", file=sys.stderr)
+            continue
+        best = min(runs, key=lambda r: r["wall_s"])
+        results[name] = dict(best, peak_rss_mb=max(r["peak_rss_mb"] for r in runs), runs=len(runs))
+        print(f"{scale}x {name}: {best['wall_s']:.3f}s, {results[name]['peak_rss_mb']:.0f} MB", file=sys.stderr)
+    return {"rows": info["rows"], "stages": results}
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Wall-time ratio against the baseline for every stage both runs measured."""
+    comparison = {}
+    for scale, run in results["scales"].items():
+        base = baseline.get("scales", {}).get(scale, {}).get("stages", {})
+        for name, stage in run["stages"].items():
+            if "wall_s" not in stage or "wall_s" not in base.get(name, {}):
+                continue
+            ratio = stage["wall_s"] / base[name]["wall_s"] if base[name]["wall_s"] > 0 else None
+            comparison.setdefault(scale, {})[name] = {
+                "baseline_wall_s": base[name]["wall_s"],
+                "ratio": round(ratio, 3) if ratio is not None else None,
+                "regression": (
+                    ratio is not None and ratio > 1 + tolerance
+                    and stage["wall_s"] - base[name]["wall_s"] > MIN_REGRESSION_S
+                ),
+            }
+    return comparison
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the BoxOut data pipeline on synthetic seasons.")
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES)
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs per stage; the fastest is kept")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--stage", help=argparse.SUPPRESS)  # internal: run one stage in this process
+    args = parser.parse_args(argv)
+
+    if args.stage:
+        print(json.dumps(run_stage(args.stage)))
+        return 0
+
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "scales": {str(scale): run_scale(scale, args.stages, args.seed, args.repeat) for scale in args.scales},
+    }
+
+    failed = any("error" in s for run in results["scales"].values() for s in run["stages"].values())
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            results["comparison"] = compare(results, json.load(f), args.tolerance)
+    regressions = [
+        f"{scale}x {name} ({stage['ratio']}x)"
+        for scale, stages in results.get("comparison", {}).items()
+        for name, stage in stages.items() if stage["regression"]
+    ]
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+    if regressions:
+        print(f"Slower than baseline: {', '.join(regressions)}", file=sys.stderr)
+    return 1 if failed or regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
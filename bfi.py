@@ -0,0 +1,106 @@
+import json
+import pandas as pd
+
+# BENCH-FREED MINUTES (BFI)
+#
+# For every box-score row, BFI is the sum of the average minutes of teammates
+# who share the player's primary position and were listed as "Out" on that
+# game date. Everything is done with joins against two small indexes instead
+# of rescanning the box scores and the injury report once per row.
+#
+# The injury report names teams in full ("New York Knicks") while the box
+# scores use the simple name ("Knicks"); load_injuries maps TEAM through
+# teams.json into playerteamName, which is what the joins use.
+
+TEAMS_FILE = "teams.json"
+
+def simple_team_names(teams, teams_file=TEAMS_FILE):
+    """The box-score name ("Knicks") of each full team name ("New York Knicks") in teams."""
+    with open(teams_file, "r") as f:
+        entries = json.load(f)
+    lookup = {entry["teamName"]: entry["simpleName"] for entry in entries}
+    for name in teams.dropna().unique():
+        if name in lookup:
+            continue
+        # other spellings ("LA Clippers") still end in the simple name
+        matches = [e["simpleName"] for e in entries if name == e["simpleName"] or name.endswith(" " + e["simpleName"])]
+        if len(matches) == 1:
+            lookup[name] = matches[0]
+        else:
+            print(f"Warning: no team in {teams_file} for {name!r}, its injuries are ignored.")
+    return teams.map(lookup)
+
+def load_injuries(path="injury_data.csv", teams_file=TEAMS_FILE):
+    injuries = pd.read_csv(path)
+    injuries['DATE'] = pd.to_datetime(injuries['DATE'])
+    injuries['player_name'] = injuries['PLAYER'].apply(lambda x: f"{x.split(', ')[1]} {x.split(', ')[0]}")
+    injuries['playerteamName'] = simple_team_names(injuries['TEAM'], teams_file)
+    return injuries
+
+def index_injuries(injuries, status="Out"):
+    """(team, date, status) index of injured players, split into first/last names."""
+    out = injuries[injuries['STATUS'] == status]
+    out = pd.DataFrame({
+        'playerteamName': out['playerteamName'].values,
+        'game_day': out['DATE'].dt.normalize().values,
+        'player_name': out['player_name'].values,
+    }).drop_duplicates()
+
+    # single-token names can't be matched to a first/last pair
+    parts = out['player_name'].str.split(' ', n=1)
+    out['firstName'] = parts.str[0]
+    out['lastName'] = parts.str[1]
+    return out[out['lastName'].notna()]
+
+def index_teammates(nba_recent):
+    """(team, primary position) index of every player seen in the window."""
+    return pd.DataFrame({
+        'playerteamName': nba_recent['playerteamName'].values,
+        'pos_key': nba_recent['position'].str[0].values,
+        'firstName': nba_recent['firstName'].values,
+        'lastName': nba_recent['lastName'].values,
+    }).drop_duplicates()
+
+def compute_bfi(nba_recent, injuries, teammates=None):
+    """Return a Series of BFI values aligned to nba_recent's index.
+
+    nba_recent needs firstName, lastName, playerteamName, position, gameDate
+    and avg_minutes; injuries is the frame returned by load_injuries().
+    teammates defaults to index_teammates(nba_recent) and can be widened
+    with players seen in earlier runs.
+    """
+    if nba_recent.empty:
+        return pd.Series(dtype=float, index=nba_recent.index)
+
+    rows = pd.DataFrame({
+        'row': range(len(nba_recent)),
+        'playerteamName': nba_recent['playerteamName'].values,
+        'pos_key': nba_recent['position'].str[0].values,
+        'gameDate': nba_recent['gameDate'].values,
+        'game_day': nba_recent['gameDate'].dt.normalize().values,
+    })
+
+    # injured teammates listed for each row's team and date
+    injured = index_injuries(injuries)
+    hits = rows.merge(injured, on=['playerteamName', 'game_day'])
+
+    # ...who also played the same primary position for that team
+    if teammates is None:
+        teammates = index_teammates(nba_recent)
+    hits = hits.merge(teammates, on=['playerteamName', 'pos_key', 'firstName', 'lastName'])
+
+    # ...and have an average-minutes entry for that exact game
+    minutes = (
+        nba_recent[['firstName', 'lastName', 'gameDate', 'avg_minutes']]
+        .drop_duplicates(subset=['firstName', 'lastName', 'gameDate'], keep='last')
+    )
+    hits = hits.merge(minutes, on=['firstName', 'lastName', 'gameDate'])
+
+    # a missing average poisons the row, same as summing NaN in a loop
+    totals = hits.groupby('row')['avg_minutes'].sum()
+    totals[hits['avg_minutes'].isna().groupby(hits['row']).any()] = float('nan')
+
+    bfi = pd.Series(0.0, index=range(len(nba_recent)))
+    bfi.loc[totals.index] = totals.values
+    bfi.index = nba_recent.index
+    return bfi
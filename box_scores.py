@@ -0,0 +1,265 @@
+import functools
+import glob
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import schema
+
+# BOX-SCORE STORE
+#
+# PlayerStatistics.csv is parsed once into one Parquet file per month under
+# STORE_DIR, streaming the CSV in chunks of CSV_CHUNK_ROWS. Scripts then
+# read only the columns and months they need instead of re-parsing the whole
+# Kaggle CSV every run.
+
+DATASET = "eoinamoore/historical-nba-data-and-player-box-scores"
+STORE_DIR = "box_scores"
+MANIFEST = "_manifest.json"
+# lock files next to the store: one build at a time, and no swap while someone reads
+BUILD_LOCK = ".build.lock"
+READ_LOCK = ".lock"
+# point at a local copy of the dataset (e.g. bench.py's synthetic data) instead of downloading
+DATASET_DIR_ENV = "BOXOUT_DATASET_DIR"
+# rows per chunk when reading the CSV, which bounds the memory of building the
+# store and of the no-pyarrow fallback
+CSV_CHUNK_ROWS = 200_000
+
+@functools.lru_cache(maxsize=None)
+def _download_dataset():
+    # kagglehub is only needed when the dataset is actually fetched, once per process
+    import kagglehub
+    return kagglehub.dataset_download(DATASET)
+
+def dataset_path():
+    return os.environ.get(DATASET_DIR_ENV) or _download_dataset()
+
+def refresh_dataset():
+    """Forget the resolved dataset, so the next dataset_path() picks up a newer Kaggle version.
+
+    Long-running processes (the dashboard's refresher) call this before each
+    rebuild; scripts resolve the dataset once per run.
+    """
+    _download_dataset.cache_clear()
+
+def stats_csv():
+    return os.path.join(dataset_path(), "PlayerStatistics.csv")
+
+def _source_signature(csv_path):
+    st = os.stat(csv_path)
+    return {"source": os.path.abspath(csv_path), "size": st.st_size, "mtime": st.st_mtime}
+
+def _read_manifest(store_dir):
+    try:
+        with open(os.path.join(store_dir, MANIFEST), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def store_is_fresh(csv_path, store_dir=STORE_DIR):
+    """Whether the store was built from csv_path as it is now, or from a newer source.
+
+    A store built from a later download of the dataset is kept even when
+    csv_path is an older one, so a process still holding the old path never
+    rebuilds over it.
+    """
+    manifest = _read_manifest(store_dir)
+    if manifest is None:
+        return False
+    signature = _source_signature(csv_path)
+    if {k: manifest.get(k) for k in ("source", "size", "mtime")} == signature:
+        return True
+    return manifest.get("source") != signature["source"] and manifest.get("mtime", 0) > signature["mtime"]
+
+def _widen(kind, other):
+    """The dtype a column read whole would get, given the dtypes two chunks gave it."""
+    if kind is None or kind == other:
+        return other
+    if pd.api.types.is_bool_dtype(kind) or pd.api.types.is_bool_dtype(other):
+        return np.dtype(object)
+    if pd.api.types.is_numeric_dtype(kind) and pd.api.types.is_numeric_dtype(other):
+        return np.result_type(kind, other)
+    return np.dtype(object)
+
+def _write_month(part_files, path, dtypes):
+    """Concatenate a month's chunk parts in file order into one Parquet file sorted by gameDate."""
+    # mixed-type text columns can't be written to Parquet as-is
+    dtypes = {col: ('string' if kind == object else kind) for col, kind in dtypes.items()}
+    month = pd.concat([pd.read_parquet(f).astype(dtypes) for f in part_files], ignore_index=True)
+    month = month.sort_values(by='gameDate', kind='stable')
+    month.to_parquet(path, index=False)
+
+@contextmanager
+def _locked(path, shared=False):
+    """Blocking flock on path, exclusive unless shared."""
+    try:
+        import fcntl
+    except ImportError:  # no flock (Windows): single process, nothing to coordinate
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def build_store(csv_path=None, store_dir=STORE_DIR, chunksize=CSV_CHUNK_ROWS, only_if_stale=False):
+    """Convert the box-score CSV into month-partitioned Parquet files.
+
+    The CSV is streamed in chunks of `chunksize` rows; each chunk's rows are
+    appended to their month as a part file, and each month's parts are then
+    merged into its partition, so memory is bounded by a chunk or a month
+    rather than the whole CSV.
+
+    Builders of the same store hold BUILD_LOCK, so they run one after the
+    other; with only_if_stale, one that waited for another build returns
+    the store that build left if it is fresh now.
+    """
+    csv_path = csv_path or stats_csv()
+    with _locked(f"{store_dir}{BUILD_LOCK}"):
+        if only_if_stale and store_is_fresh(csv_path, store_dir):
+            return _read_manifest(store_dir)
+
+        # left behind by builds that were killed; no other build is running
+        for leftover in glob.glob(f"{glob.escape(store_dir)}.tmp.*"):
+            shutil.rmtree(leftover, ignore_errors=True)
+        # build next to the live store, then swap so readers never see half a store
+        tmp_dir = tempfile.mkdtemp(
+            prefix=f"{os.path.basename(store_dir)}.tmp.", dir=os.path.dirname(os.path.abspath(store_dir))
+        )
+        os.chmod(tmp_dir, 0o755)
+        manifest = _write_store(csv_path, tmp_dir, chunksize)
+
+        # readers hold READ_LOCK shared from reading the manifest until their last month
+        old_dir = f"{tmp_dir}.old"
+        with _locked(f"{store_dir}{READ_LOCK}"):
+            if os.path.exists(store_dir):
+                os.rename(store_dir, old_dir)
+            os.rename(tmp_dir, store_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    print(f"Box-score store saved with {manifest['rows']} rows in {len(manifest['months'])} months → {store_dir}")
+    return manifest
+
+def _write_store(csv_path, out_dir, chunksize):
+    parts_dir = os.path.join(out_dir, "_parts")
+    os.makedirs(parts_dir)
+
+    dtypes = {}  # column -> dtype over every chunk so far
+    parts = {}   # month -> its part files, in CSV order
+    rows = 0
+    for chunk in _csv_chunks(csv_path, chunksize=chunksize):
+        for col, kind in chunk.dtypes.items():
+            dtypes[col] = _widen(dtypes.get(col), kind)
+        chunk = chunk.astype({col: 'string' for col in chunk.select_dtypes(include='object').columns})
+
+        months = chunk['gameDate'].dt.strftime("%Y-%m")
+        for month, part in chunk.groupby(months, sort=False):
+            part_files = parts.setdefault(month, [])
+            part_files.append(os.path.join(parts_dir, f"{month}.{len(part_files)}.parquet"))
+            part.to_parquet(part_files[-1], index=False)
+        rows += len(chunk)
+
+    for month, part_files in sorted(parts.items()):
+        _write_month(part_files, os.path.join(out_dir, f"{month}.parquet"), dtypes)
+    shutil.rmtree(parts_dir)
+
+    manifest = _source_signature(csv_path)
+    manifest["rows"] = rows
+    manifest["months"] = sorted(parts)
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def _read_store(store_dir, columns, start, end):
+    # the manifest and the months it lists must come from the same build
+    with _locked(f"{store_dir}{READ_LOCK}", shared=True):
+        return _read_months(store_dir, columns, start, end)
+
+def _read_months(store_dir, columns, start, end):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    manifest = _read_manifest(store_dir)
+    months = manifest["months"]
+    if start is not None:
+        months = [m for m in months if m >= start.strftime("%Y-%m")]
+    if end is not None:
+        months = [m for m in months if m <= end.strftime("%Y-%m")]
+
+    read_cols = None if columns is None else list(dict.fromkeys(list(columns) + ['gameDate']))
+    filters = []
+    if start is not None:
+        filters.append(('gameDate', '>=', start))
+    if end is not None:
+        filters.append(('gameDate', '<', end))
+
+    tables = [
+        pq.read_table(
+            os.path.join(store_dir, f"{m}.parquet"),
+            columns=read_cols, filters=filters or None, memory_map=True
+        )
+        for m in months
+    ]
+    if not tables:
+        return pd.DataFrame(columns=read_cols or [])
+    return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+def _csv_chunks(csv_path, usecols=None, dtype=None, chunksize=CSV_CHUNK_ROWS):
+    """Yield the CSV `chunksize` rows at a time, with gameDate parsed."""
+    with pd.read_csv(csv_path, usecols=usecols, dtype=dtype, low_memory=False, chunksize=chunksize) as reader:
+        for chunk in reader:
+            chunk['gameDate'] = pd.to_datetime(chunk['gameDate'])
+            yield chunk
+
+def _read_csv(csv_path, columns, start, end, dtype=None, chunksize=CSV_CHUNK_ROWS):
+    """Stream the CSV in chunks, keeping only rows with gameDate in [start, end)."""
+    usecols = None if columns is None else list(dict.fromkeys(list(columns) + ['gameDate']))
+    # chunks would each get their own categories; convert once all rows are in
+    dtype = dtype or {}
+    categories = [col for col, kind in dtype.items() if kind == 'category']
+    chunk_dtype = {col: (object if kind == 'category' else kind) for col, kind in dtype.items()}
+
+    parts = []
+    for chunk in _csv_chunks(csv_path, usecols, chunk_dtype or None, chunksize):
+        keep = pd.Series(True, index=chunk.index)
+        if start is not None:
+            keep &= chunk['gameDate'] >= start
+        if end is not None:
+            keep &= chunk['gameDate'] < end
+        parts.append(chunk[keep])
+
+    if not parts:
+        return pd.DataFrame(columns=usecols or [])
+    nba = pd.concat(parts, ignore_index=True)
+    return nba.astype({col: 'category' for col in categories if col in nba.columns})
+
+def load_box_scores(columns=None, start=None, end=None, csv_path=None, store_dir=STORE_DIR, compact=False):
+    """Load box scores with gameDate in [start, end), parsed as datetimes.
+
+    Reads from the Parquet store, building it first when it is missing or
+    older than the CSV. Falls back to streaming the CSV in chunks and keeping
+    only the date range when pyarrow isn't installed. With compact=True the
+    frame uses schema.py's dtypes.
+    """
+    csv_path = csv_path or stats_csv()
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        dtype = schema.dtypes_for(columns or schema.DTYPES) if compact else None
+        return _read_csv(csv_path, columns, start, end, dtype)
+
+    if not store_is_fresh(csv_path, store_dir):
+        build_store(csv_path, store_dir, only_if_stale=True)
+    nba = _read_store(store_dir, columns, start, end)
+    return schema.compact(nba) if compact else nba
+
+if __name__ == "__main__":
+    build_store()
@@ -1,87 +1,88 @@
 import json
 import os
 import pandas as pd
-import kagglehub
+from box_scores import dataset_path, load_box_scores
+from scoring import STAT_COLUMNS, add_fantasy_points
+from players import position_from_flags
+from tracing import stage
 
 CACHE_FILE = "player_lookup_cache.json"
-BASE_PATH = kagglehub.dataset_download("eoinamoore/historical-nba-data-and-player-box-scores")
-STATS_CSV = os.path.join(BASE_PATH, "PlayerStatistics.csv")
-PLAYERS_CSV = os.path.join(BASE_PATH, "Players.csv")
+ENTRY_FIELDS = ["player_id", "image_url", "season_fp", "games_played", "avg_fp", "position"]
+PLAYERS_CSV = os.path.join(dataset_path(), "Players.csv")
 
-nba = pd.read_csv(STATS_CSV, low_memory=False)
-players_df = pd.read_csv(PLAYERS_CSV)
-nba = nba[nba['gameDate'] >= "2024-10-22"]
+with stage("load") as span:
+    nba = load_box_scores(columns=['firstName', 'lastName'] + STAT_COLUMNS, start="2024-10-22")
+    players_df = pd.read_csv(PLAYERS_CSV)
+    span.rows = len(nba)
 
 players_df["guard"] = players_df["guard"].astype(bool)
 players_df["forward"] = players_df["forward"].astype(bool)
 players_df["center"] = players_df["center"].astype(bool)
 
-nba['fp'] = (
-    nba['points'] +
-    nba['reboundsTotal'] +
-    nba['assists'] * 2 -
-    nba['turnovers'] * 2 +
-    nba['fieldGoalsMade'] * 2 -
-    nba['fieldGoalsAttempted'] +
-    nba['blocks'] * 4 +
-    nba['steals'] * 4 -
-    (nba['freeThrowsAttempted'] - nba['freeThrowsMade']) +
-    nba['threePointersMade']
-)
-
-all_names = nba[['firstName', 'lastName']].drop_duplicates()
-
-def get_position(row):
-    roles = []
-    if row.get("guard") == True: roles.append("G")
-    if row.get("forward") == True: roles.append("F")
-    if row.get("center") == True: roles.append("C")
-    return "-".join(roles) if roles else None
-
-players_df["position"] = players_df.apply(get_position, axis=1)
-
-if os.path.exists(CACHE_FILE):
-    with open(CACHE_FILE, "r") as f:
-        player_lookup = json.load(f)
-else:
-    player_lookup = {}
-
-updated = False
-for _, row in all_names.iterrows():
-    full_name = f"{row['firstName']} {row['lastName']}"
-
-    match = players_df[(players_df['firstName'] == row['firstName']) & (players_df['lastName'] == row['lastName'])]
-    if match.empty:
-        print(f"Skipped {full_name} — not found in Players.csv")
-        continue
-
-    pid = str(match.iloc[0].get("personId"))
-    position = match.iloc[0].get("position")
-    image_url = f"https://cdn.nba.com/headshots/nba/latest/260x190/{pid}.png"
-
-    player_stats = nba[(nba['firstName'] == row['firstName']) & (nba['lastName'] == row['lastName'])]
-    total_fp = round(player_stats['fp'].sum(), 1)
-    games_played = len(player_stats)
-    avg_fp = round(total_fp / games_played, 1) if games_played > 0 else 0.0
-
-    current_entry = player_lookup.get(full_name, {})
-    new_entry = {
-        "player_id": pid,
-        "image_url": image_url,
-        "season_fp": total_fp,
-        "games_played": games_played,
-        "avg_fp": avg_fp,
-        "position": current_entry.get("position") or position
-    }
-
-    if player_lookup.get(full_name) != new_entry:
-        player_lookup[full_name] = new_entry
-        updated = True
-        print(f"Updated {full_name}: {pid}, {new_entry['position']}, FP={total_fp}, AVG={avg_fp}")
-
-if updated:
-    with open(CACHE_FILE, "w") as f:
-        json.dump(player_lookup, f, indent=2)
-    print(f"Cache saved with {len(player_lookup)} players.")
-else:
-    print("All players already cached.")
+with stage("season_aggregates", rows=len(nba)):
+    nba = add_fantasy_points(nba)
+
+    # season aggregates for every player in one pass
+    season = (
+        nba.groupby(['firstName', 'lastName'], sort=False)
+        .agg(season_fp=('fp', 'sum'), games_played=('fp', 'size'))
+        .reset_index()
+    )
+    season['season_fp'] = season['season_fp'].round(1)
+    season['avg_fp'] = (season['season_fp'] / season['games_played']).round(1)
+
+with stage("positions", rows=len(players_df)):
+    # positions and ids from Players.csv, first match per name
+    players_df["position"] = position_from_flags(players_df)
+    players_df = players_df.drop_duplicates(subset=['firstName', 'lastName'])
+
+    season = season.merge(
+        players_df[['firstName', 'lastName', 'personId', 'position']],
+        on=['firstName', 'lastName'], how='left', indicator=True
+    )
+    season['full_name'] = season['firstName'] + " " + season['lastName']
+
+for full_name in season.loc[season['_merge'] == 'left_only', 'full_name']:
+    print(f"Skipped {full_name} — not found in Players.csv")
+season = season[season['_merge'] == 'both'].set_index('full_name')
+
+with stage("diff_cache", rows=len(season)):
+    if os.path.exists(CACHE_FILE):
+        with open(CACHE_FILE, "r") as f:
+            player_lookup = json.load(f)
+    else:
+        player_lookup = {}
+
+    current = pd.DataFrame.from_dict(player_lookup, orient='index', columns=ENTRY_FIELDS).reindex(season.index)
+
+    # positions already in the cache (e.g. backfilled by patch.py) win over Players.csv
+    keep_cached = current['position'].notna() & (current['position'] != "")
+    season['position'] = current['position'].where(keep_cached, season['position'])
+
+    season['player_id'] = season['personId'].astype('int64').astype(str)
+    season['image_url'] = "https://cdn.nba.com/headshots/nba/latest/260x190/" + season['player_id'] + ".png"
+    new_entries = season[ENTRY_FIELDS]
+
+    def entry_hashes(entries):
+        normalized = entries.astype({
+            'player_id': object, 'image_url': object, 'season_fp': float,
+            'games_played': float, 'avg_fp': float, 'position': object
+        })
+        normalized['position'] = normalized['position'].where(normalized['position'].notna(), None)
+        return pd.util.hash_pandas_object(normalized, index=True)
+
+    # only entries whose hash differs from the cached one get rewritten
+    changed = entry_hashes(new_entries).values != entry_hashes(current).values
+
+updates = json.loads(new_entries[changed].to_json(orient='index'))
+for full_name, entry in updates.items():
+    player_lookup[full_name] = entry
+    print(f"Updated {full_name}: {entry['player_id']}, {entry['position']}, FP={entry['season_fp']}, AVG={entry['avg_fp']}")
+
+with stage("write_cache", rows=len(updates)):
+    if updates:
+        with open(CACHE_FILE, "w") as f:
+            json.dump(player_lookup, f, indent=2)
+        print(f"Cache saved with {len(player_lookup)} players.")
+    else:
+        print("All players already cached.")
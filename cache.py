@@ -0,0 +1,193 @@
+import functools
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# CALLBACK CACHE
+#
+# Memoizes rendered Dash components and figures keyed on (function, data
+# version, arguments), so a callback only renders once per snapshot and set
+# of inputs. Two backends with the same interface:
+#   MemoryCache  per-process LRU with a TTL
+#   FileCache    pickles in a directory, shared by every worker on the host;
+#                least recently used files are dropped past maxsize
+# In both an entry expires ttl seconds after it was stored, however often it
+# is hit.
+# Both count hits, misses and evictions; stats() returns the counters.
+
+DEFAULT_MAXSIZE = 256
+DEFAULT_TTL = 3600  # seconds
+MISSING = object()
+
+class _Counters:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+class MemoryCache:
+    """In-process LRU cache whose entries also expire ttl seconds after they were stored."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (stored_at, value), least recently used first
+        self._lock = threading.Lock()
+        self.counters = _Counters()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.counters.evictions += 1
+                entry = None
+            if entry is None:
+                self.counters.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.counters.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.counters.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters.as_dict(), backend="memory", size=len(self._entries), maxsize=self.maxsize)
+
+# a FileCache entry: the value and when it was stored (the file's mtime is its last use)
+_Stored = namedtuple("_Stored", ["stored_at", "value"])
+
+class FileCache:
+    """Pickled entries in a directory shared across processes, with LRU eviction and a TTL.
+
+    Files are written next to their final name and swapped in, and a hit
+    touches the file, so its mtime is the last use. The time an entry was
+    stored is pickled with it, which is what the TTL counts from.
+    """
+
+    def __init__(self, directory, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.counters = _Counters()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            # anything else is a file from before store times were kept
+            expired = not isinstance(entry, _Stored) or bool(self.ttl and time.time() - entry.stored_at > self.ttl)
+            value = MISSING if expired else entry.value
+            if not expired:
+                os.utime(path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            expired, value = False, MISSING
+
+        with self._lock:
+            if expired:
+                self._remove(path)
+                self.counters.evictions += 1
+                value = MISSING
+            if value is MISSING:
+                self.counters.misses += 1
+            else:
+                self.counters.hits += 1
+        return value
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "wb") as f:
+            pickle.dump(_Stored(time.time(), value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, path)
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except OSError:
+                    pass  # evicted by another worker
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        for _, path in entries[:max(0, len(entries) - self.maxsize)]:
+            self._remove(path)
+            with self._lock:
+                self.counters.evictions += 1
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        for _, path in self._entries():
+            self._remove(path)
+
+    def stats(self):
+        with self._lock:
+            counters = self.counters.as_dict()
+        return dict(counters, backend="file", size=len(self._entries()), maxsize=self.maxsize)
+
+def make_key(name, version, args, kwargs):
+    """Stable key for a call: the same across processes, so FileCache can share it."""
+    payload = json.dumps([name, version, args, kwargs], sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def memoize(cache, version=lambda: None):
+    """Cache a function's results in `cache`, keyed on version() and its arguments.
+
+    version() should change whenever the data the function renders does (the
+    dashboard passes the snapshot's file signature), so stale entries are
+    never served and just age out of the cache.
+    """
+    def decorate(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(name, version(), args, kwargs)
+            value = cache.get(key)
+            if value is MISSING:
+                value = func(*args, **kwargs)
+                cache.set(key, value)
+            return value
+        return wrapper
+    return decorate
@@ -1,162 +1,214 @@
-import kagglehub
-import os
-import pandas as pd
+import gzip
 import json
+import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import dash
 from dash import html, dcc
-import plotly.express as px
 from dash.dependencies import Input, Output
-from predictor import get_tomorrows_predictions
-from plots import create_pred_vs_actual_plot
-
-# ---------------
-# DATA PROCESSING
-# ---------------
-
-# Download latest version of the NBA dataset, read data
-path = kagglehub.dataset_download("eoinamoore/historical-nba-data-and-player-box-scores")
-nba = pd.read_csv(
-    os.path.join(path, "PlayerStatistics.csv"), 
-    nrows=10000,
-    low_memory=False
-)
-
-# Convert date
-nba['gameDate'] = pd.to_datetime(nba['gameDate'])
-
-# Create new df with relevant data for fantasy
-fantasy_stats = nba[nba['gameDate'] >= pd.Timestamp("2024-10-22")][
-    ['firstName', 'lastName', 'gameDate', 'playerteamName', 'opponentteamName', 'win',
-     'numMinutes', 'points', 'assists', 'blocks', 'steals',
-     'fieldGoalsAttempted', 'fieldGoalsMade', 'reboundsTotal', 'turnovers',
-     'threePointersMade', 'freeThrowsAttempted', 'freeThrowsMade']
+from tracing import stage
+from cache import FileCache, MemoryCache, memoize
+
+# -------------
+# DATA SNAPSHOT
+# -------------
+
+# All section data and figures come precomputed from snapshot.py; the app
+# only reads the snapshot file and picks up a new one whenever it is swapped in.
+# A background thread keeps it fresh: it swaps in snapshot files written by
+# anyone else, and rebuilds the snapshot itself once it is older than the
+# refresh interval or one of WATCHED_FILES changed after it was built.
+# Requests only ever read the snapshot that is already loaded.
+SNAPSHOT_FILE = "dashboard_snapshot.json.gz"
+MAX_SNAPSHOT_AGE = timedelta(hours=24)
+# seconds between rebuilds; 0 turns rebuilding off (new files are still picked up)
+REFRESH_ENV = "BOXOUT_REFRESH_SECONDS"
+REFRESH_INTERVAL = timedelta(hours=1)
+POLL_SECONDS = 30
+# wait after a failed rebuild before trying again
+RETRY_SECONDS = 300
+# only one process (e.g. one gunicorn worker) rebuilds at a time
+LOCK_FILE = "dashboard_snapshot.lock"
+# inputs of the snapshot build
+WATCHED_FILES = [
+    "models/current.json",
+    "model_training_data.csv",
+    "player_lookup_cache.json",
+    "opponent_strength_cache.json",
+    "box_scores/_manifest.json",
 ]
 
-fantasy_stats['fp'] = (
-    fantasy_stats['points'] +
-    fantasy_stats['reboundsTotal'] +
-    fantasy_stats['assists'] * 2 -
-    fantasy_stats['turnovers'] * 2 +
-    fantasy_stats['fieldGoalsMade'] * 2 -
-    fantasy_stats['fieldGoalsAttempted'] +
-    fantasy_stats['blocks'] * 4 +
-    fantasy_stats['steals'] * 4 -
-    (fantasy_stats['freeThrowsAttempted'] - fantasy_stats['freeThrowsMade']) +
-    fantasy_stats['threePointersMade']
-)
-
-# cache money
-CACHE_FILE = "player_lookup_cache.json"
-with open("player_lookup_cache.json", "r") as f:
-    player_lookup = json.load(f)
-
-def get_cached(field, row):
-    key = f"{row['firstName']} {row['lastName']}"
-    return player_lookup.get(key, {}).get(field)
-
-# --------------
-# TOP PERFORMERS
-# --------------
-
-# yesterday's top performers
-# yesterday = datetime.today().date() - timedelta(days=1)
-now = datetime.now()
-adjusted_date = (now - timedelta(hours=8)).date()
-yesterday = adjusted_date - timedelta(days=1)
-games_yesterday = fantasy_stats[fantasy_stats['gameDate'].dt.date == yesterday].copy()
-games_yesterday["player_id"] = games_yesterday.apply(lambda row: get_cached("player_id", row), axis=1)
-games_yesterday["image_url"] = games_yesterday.apply(lambda row: get_cached("image_url", row), axis=1)
-games_yesterday["position"] = games_yesterday.apply(lambda row: get_cached("position", row), axis=1)
-games_yesterday = games_yesterday[games_yesterday["position"].notna()]
-
-top_5 = games_yesterday.sort_values(by='fp', ascending=False).head(5).copy()
-top_5["category"] = "All"
-
-top_guards = games_yesterday[games_yesterday["position"].astype(str).str.startswith("G")] \
-    .sort_values(by="fp", ascending=False).head(5).copy()
-top_guards["category"] = "Guards"
-
-top_forwards = games_yesterday[games_yesterday["position"].astype(str).str.startswith("F")] \
-    .sort_values(by="fp", ascending=False).head(5).copy()
-top_forwards["category"] = "Forwards"
-
-top_centers = games_yesterday[games_yesterday["position"].astype(str).str.startswith("C")] \
-    .sort_values(by="fp", ascending=False).head(5).copy()
-top_centers["category"] = "Centers"
-
-top_fantasy_players = pd.concat([top_5, top_guards, top_forwards, top_centers], ignore_index=True)
-
-# Top 3 performers over their last 5 games
-sorted_stats = fantasy_stats.sort_values(by=['firstName', 'lastName', 'gameDate'])
-last_5_games = sorted_stats.groupby(['firstName', 'lastName']).tail(5)
-
-player_totals = last_5_games.groupby(['firstName', 'lastName']).agg({
-    'fp': 'sum',
-    'playerteamName': 'last'
-}).reset_index()
-
-top_3 = player_totals.sort_values(by='fp', ascending=False).head(3)
-top_3_names = top_3[['firstName', 'lastName']]
-merged = pd.merge(last_5_games, top_3_names, on=['firstName', 'lastName'], how='inner')
-
-merged['player_id'] = merged.apply(lambda row: get_cached('player_id', row), axis=1)
-merged['image_url'] = merged.apply(lambda row: get_cached('image_url', row), axis=1)
-merged['position'] = merged.apply(lambda row: get_cached('position', row), axis=1)
-
-# -----------------
-# BUY LOW/SELL HIGH
-# -----------------
-
-last_5 = (
-    fantasy_stats
-    .sort_values(by='gameDate')
-    .groupby(['firstName', 'lastName'])
-    .tail(5)
-)
+def read_snapshot(path=SNAPSHOT_FILE):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+def snapshot_age(snapshot):
+    return datetime.now() - datetime.fromisoformat(snapshot["built_at"])
+
+def is_stale(snapshot, max_age=MAX_SNAPSHOT_AGE):
+    return snapshot_age(snapshot) > max_age
+
+class LoadedSnapshot:
+    """A snapshot and the file signature it was read with."""
+
+    def __init__(self, snapshot, signature):
+        self.snapshot = snapshot
+        self.signature = signature
+
+class SnapshotLoader:
+    """Holds the current snapshot and reloads it when a new file is swapped in."""
+
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.path = path
+        self.loaded = None
+
+    def reload(self):
+        """Read the file if it changed since the last load; True when a new snapshot was swapped in."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            if self.loaded is None:
+                raise
+            return False
+
+        signature = (st.st_mtime_ns, st.st_size)
+        if self.loaded is not None and signature == self.loaded.signature:
+            return False
+        loaded = LoadedSnapshot(read_snapshot(self.path), signature)
+        # a single assignment, so a request sees either the old snapshot or the new one
+        self.loaded = loaded
+        if is_stale(loaded.snapshot):
+            print(f"Warning: dashboard snapshot is from {loaded.snapshot['built_at']}, run snapshot.py to refresh.")
+        return True
+
+    def current(self):
+        if self.loaded is None:
+            self.reload()
+        return self.loaded
+
+    def get(self):
+        return self.current().snapshot
+
+class SnapshotRefresher:
+    """Background thread that keeps a SnapshotLoader up to date without blocking requests."""
+
+    def __init__(self, loader, interval=REFRESH_INTERVAL, watched=WATCHED_FILES, poll_seconds=POLL_SECONDS):
+        self.loader = loader
+        self.interval = interval
+        self.watched = watched
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread = None
+        self._retry_at = 0.0
+
+    def due(self):
+        """Whether the loaded snapshot is older than the interval or than one of its inputs."""
+        if not self.interval:
+            return False
+        snapshot = self.loader.get()
+        if snapshot_age(snapshot) >= self.interval:
+            return True
+        built_at = datetime.fromisoformat(snapshot["built_at"]).timestamp()
+        return any(os.path.exists(path) and os.path.getmtime(path) > built_at for path in self.watched)
+
+    def refresh(self):
+        """Rebuild the snapshot unless another process is already doing it."""
+        with _exclusive(LOCK_FILE) as acquired:
+            # another process may have just finished a build
+            if not acquired or (self.loader.reload() and not self.due()):
+                return False
+            with stage("refresh_snapshot"):
+                from box_scores import refresh_dataset
+                from snapshot import build_snapshot
+                # the dataset was resolved when this process first needed it; look for a newer version
+                refresh_dataset()
+                build_snapshot(self.loader.path)
+            self.loader.reload()
+            return True
+
+    def poll(self):
+        self.loader.reload()
+        if self.due() and time.monotonic() >= self._retry_at:
+            try:
+                self.refresh()
+            except Exception:
+                self._retry_at = time.monotonic() + RETRY_SECONDS
+                raise
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.poll()
+            except Exception as e:
+                # keep serving the snapshot we have and try again next poll
+                print(f"Warning: dashboard snapshot refresh failed: {e!r}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="snapshot-refresher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+@contextmanager
+def _exclusive(path):
+    """Non-blocking exclusive lock on path; yields whether it was acquired."""
+    try:
+        import fcntl
+    except ImportError:  # no flock (Windows): single process, nothing to coordinate
+        yield True
+        return
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def refresh_interval():
+    seconds = os.environ.get(REFRESH_ENV)
+    return REFRESH_INTERVAL if seconds is None else timedelta(seconds=float(seconds))
+
+with stage("dashboard_startup"):
+    if not os.path.exists(SNAPSHOT_FILE):
+        # first run only: build the snapshot inline
+        with stage("build_snapshot"):
+            from snapshot import build_snapshot
+            build_snapshot(SNAPSHOT_FILE)
+
+    snapshots = SnapshotLoader(SNAPSHOT_FILE)
+    with stage("load_snapshot"):
+        snapshots.reload()
+    refresher = SnapshotRefresher(snapshots, refresh_interval()).start()
 
-play_counts = (
-    last_5
-    .assign(played=lambda df: df['numMinutes'] > 0)
-    .groupby(['firstName', 'lastName'])['played']
-    .sum()
-    .reset_index()
-    .rename(columns={'played': 'played_5_count'})
-)
-
-recent_avg = (
-    last_5
-    .groupby(['firstName', 'lastName'])['fp']
-    .mean()
-    .reset_index()
-    .rename(columns={'fp': 'recent_avg_fp'})
-)
+# ---------------
+# RENDER CACHE
+# ---------------
 
-recent_game_info = (
-    last_5
-    .sort_values(by='gameDate', ascending=False)
-    .groupby(['firstName', 'lastName'])
-    .head(1)[['firstName', 'lastName', 'playerteamName']]
-)
+# Rendered sections are cached per (snapshot version, inputs). Every worker
+# keeps its own LRU unless BOXOUT_CACHE_DIR points them at a shared directory.
+CACHE_DIR_ENV = "BOXOUT_CACHE_DIR"
+CACHE_MAXSIZE = 256
+CACHE_TTL = 6 * 3600
 
-recent_summary = recent_avg.merge(play_counts, on=['firstName', 'lastName'])
-recent_summary = recent_summary.merge(recent_game_info, on=['firstName', 'lastName'])
+def make_cache():
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if directory:
+        return FileCache(directory, CACHE_MAXSIZE, CACHE_TTL)
+    return MemoryCache(CACHE_MAXSIZE, CACHE_TTL)
 
-lookup_df = (
-    pd.DataFrame.from_dict(player_lookup, orient='index')
-    .reset_index()
-    .rename(columns={'index': 'full_name'})
-)
-lookup_df[['firstName', 'lastName']] = lookup_df['full_name'].str.split(' ', n=1, expand=True)
+def snapshot_version():
+    return snapshots.current().signature
 
-candidates = (
-    pd.merge(lookup_df, recent_summary, on=['firstName', 'lastName'], how='inner')
-    .assign(diff=lambda df: df['recent_avg_fp'] - df['avg_fp'])
-    .query('avg_fp >= 30 and played_5_count >= 4')
-)
-
-buy_low_candidates = candidates.sort_values(by='diff').head(2)
-sell_high_candidates = candidates.sort_values(by='diff', ascending=False).head(2)
+render_cache = make_cache()
+cached = memoize(render_cache, version=snapshot_version)
 
 # ---------------
 # DASH COMPONENTS
@@ -177,29 +229,24 @@ def create_player_card(player):
         "width": "150px"
     })
 
-def create_player_row(player_df):
-    player = player_df.iloc[0]
-    total_fp = player_df['fp'].sum()
-    position = get_cached("position", player)
+@cached
+def top_performer_cards(category):
+    players = snapshots.get()["top_performers"].get(category, [])
+    return [create_player_card(row) for row in players]
+
+def create_player_row(player):
     card = html.Div([
         html.Img(src=player["image_url"], style={"width": "80px", "border-radius": "8px"}),
         html.H4(f"{player['firstName']} {player['lastName']}"),
-        html.P(f"{position}, {player['playerteamName']}"),
-        html.P(f"{total_fp} fantasy points over the past 5 games")
+        html.P(f"{player['position']}, {player['playerteamName']}"),
+        html.P(f"{player['total_fp']} fantasy points over the past 5 games")
     ], style={
         "width": "150px",
         "padding": "10px",
         "textAlign": "center"
     })
 
-    fig = px.line(
-        player_df.sort_values(by='gameDate'),
-        x='gameDate',
-        y='fp',
-        markers=True,
-        title=f"{player['firstName']} {player['lastName']} - Last 5 Games",
-    )
-    chart = dcc.Graph(figure=fig, style={"flex": "1"})
+    chart = dcc.Graph(figure=player["figure"], style={"flex": "1"})
 
     return html.Div([
         card,
@@ -212,72 +259,39 @@ def create_player_row(player_df):
         "borderBottom": "1px solid #ddd"
     })
 
-player_cards = [create_player_card(row) for _, row in top_fantasy_players.iterrows()]
-
-player_rows = []
-for _, player in top_3.iterrows():
-    player_history = merged[(merged['firstName'] == player['firstName']) & (merged['lastName'] == player['lastName'])]
-    player_rows.append(create_player_row(player_history))
-
 def create_buy_sell_card(row):
-    image_url = get_cached('image_url', row)
-    position = get_cached("position", row)
     return html.Div([
-        html.Img(src=image_url, style={"width": "80px", "border-radius": "8px"}),
-        html.H4(f"{row['firstName']} {row['lastName']}"), 
-        html.P(f"{position}, {row['playerteamName']}", style={"margin": "0"})
+        html.Img(src=row["image_url"], style={"width": "80px", "border-radius": "8px"}),
+        html.H4(f"{row['firstName']} {row['lastName']}"),
+        html.P(f"{row['position']}, {row['playerteamName']}", style={"margin": "0"})
     ], style={"textAlign": "center"})
 
 def create_fp_bar_chart(row):
-    df = pd.DataFrame({
-        "Category": ["Last 5 Avg", "Season Avg"],
-        "FP": [row['recent_avg_fp'], row['avg_fp']]
-    })
-    fig = px.bar(df, x="Category", y="FP", title=f"{row['firstName']} {row['lastName']} FP Comparison", height=500)
-    return dcc.Graph(figure=fig)
-
-buy_low_section = html.Div([
-    html.H1("Buy Low Candidates", style={"textAlign": "center"}),
-    html.Div([
-        create_buy_sell_card(buy_low_candidates.iloc[0]),
-        create_fp_bar_chart(buy_low_candidates.iloc[0]),
-        create_buy_sell_card(buy_low_candidates.iloc[1]),
-        create_fp_bar_chart(buy_low_candidates.iloc[1]),
-    ], style={
-        "display": "grid",
-        "gridTemplateColumns": "1fr 1fr",
-        "gap": "20px",
-        "backgroundColor": "#E0F7FA",
-        "padding": "20px",
-        "marginBottom": "40px"
-    })
-])
-
-sell_high_section = html.Div([
-    html.H1("Sell High Candidates", style={"textAlign": "center"}),
-    html.Div([
-        create_buy_sell_card(sell_high_candidates.iloc[0]),
-        create_fp_bar_chart(sell_high_candidates.iloc[0]),
-        create_buy_sell_card(sell_high_candidates.iloc[1]),
-        create_fp_bar_chart(sell_high_candidates.iloc[1]),
-    ], style={
-        "display": "grid",
-        "gridTemplateColumns": "1fr 1fr",
-        "gap": "20px",
-        "backgroundColor": "#FFEBEE",
-        "padding": "20px",
-        "marginBottom": "40px"
-    })
-])
+    return dcc.Graph(figure=row["figure"])
 
-top_preds, top_booms = get_tomorrows_predictions()
+def create_buy_sell_section(title, candidates, background):
+    cells = []
+    for row in candidates:
+        cells += [create_buy_sell_card(row), create_fp_bar_chart(row)]
+
+    return html.Div([
+        html.H1(title, style={"textAlign": "center"}),
+        html.Div(cells, style={
+            "display": "grid",
+            "gridTemplateColumns": "1fr 1fr",
+            "gap": "20px",
+            "backgroundColor": background,
+            "padding": "20px",
+            "marginBottom": "40px"
+        })
+    ])
 
 def create_prediction_card(row):
     return html.Div([
         html.Img(src=row["image_url"], style={"width": "80px", "border-radius": "8px"}),
         html.H4(f"{row['firstName']} {row['lastName']}"),
         html.P(f"Predicted FP: {round(row['predicted_fp'], 1)}"),
-        html.P(f"Recent Average: {round(row['season_avg_fp'], 1)}"), 
+        html.P(f"Recent Average: {round(row['season_avg_fp'], 1)}"),
         html.P(row["oss_message"], style={"margin": "0", "fontStyle": "italic"})
     ], style={
         "border": "1px solid #ccc",
@@ -288,16 +302,40 @@ def create_prediction_card(row):
         "width": "150px"
     })
 
-prediction_section = html.Div([
-    html.H1("Tomorrow's Top Predictions"),
-    html.H4("Top 3 Predicted Performers", style={"textAlign": "center"}),
-    html.Div([create_prediction_card(row) for _, row in top_preds.iterrows()],
-             style={"display": "flex", "justifyContent": "center", "gap": "10px"}),
-
-    html.H4("Top 3 Boom Candidates", style={"textAlign": "center", "marginTop": "30px"}),
-    html.Div([create_prediction_card(row) for _, row in top_booms.iterrows()],
-             style={"display": "flex", "justifyContent": "center", "gap": "10px"})
-])
+def create_prediction_section(top_preds, top_booms):
+    return html.Div([
+        html.H1("Tomorrow's Top Predictions"),
+        html.H4("Top 3 Predicted Performers", style={"textAlign": "center"}),
+        html.Div([create_prediction_card(row) for row in top_preds],
+                 style={"display": "flex", "justifyContent": "center", "gap": "10px"}),
+
+        html.H4("Top 3 Boom Candidates", style={"textAlign": "center", "marginTop": "30px"}),
+        html.Div([create_prediction_card(row) for row in top_booms],
+                 style={"display": "flex", "justifyContent": "center", "gap": "10px"})
+    ])
+
+@cached
+def prediction_section():
+    snapshot = snapshots.get()
+    return create_prediction_section(snapshot["top_preds"], snapshot["top_booms"])
+
+@cached
+def pred_vs_actual_graph():
+    return dcc.Graph(figure=snapshots.get()["pred_vs_actual"])
+
+@cached
+def last_5_rows():
+    return [create_player_row(player) for player in snapshots.get()["last_5_leaders"]]
+
+BUY_SELL_SECTIONS = {
+    "buy_low": ("Buy Low Candidates", "#E0F7FA"),
+    "sell_high": ("Sell High Candidates", "#FFEBEE"),
+}
+
+@cached
+def buy_sell_section(kind):
+    title, background = BUY_SELL_SECTIONS[kind]
+    return create_buy_sell_section(title, snapshots.get()[kind], background)
 
 # ---------
 # FRONT END
@@ -306,56 +344,66 @@ prediction_section = html.Div([
 app = dash.Dash(__name__)
 app.title = "Fantasy Basketball Dashboard"
 
-app.layout = html.Div([
-    html.Div([
-        html.H1("BoxOut", style={
-            "color": "#000000",
-            "margin": "0",
-            "fontSize": "3rem"
-        })
-    ], style={
-        "backgroundColor": "#FFA500",
-        "padding": "20px 0",
-        "textAlign": "center",
-        "boxShadow": "0px 2px 4px rgba(0,0,0,0.1)",
-        "marginBottom": "20px"
-    }),
-
-    html.H1("Yesterday's Top Performers"),
-
-    html.Div([
-        html.Button("All", id="btn-all", n_clicks=0),
-        html.Button("Guard", id="btn-guard", n_clicks=0),
-        html.Button("Forward", id="btn-forward", n_clicks=0),
-        html.Button("Center", id="btn-center", n_clicks=0)
-    ], style={
-        "textAlign": "center",
-        "marginBottom": "20px",
-        "gap": "10px",
-        "display": "flex",
-        "justifyContent": "center"
-    }),
-
-    html.Div(id="top-player-cards", style={
-        "display": "flex",
-        "flexDirection": "row",
-        "justifyContent": "center",
-        "flexWrap": "wrap",
-        "gap": "10px"
-    }),
-
-    html.Div(prediction_section),
-
-    html.H1("Model Accuracy: Predicted vs Actual"),
-    create_pred_vs_actual_plot(), 
-
-    html.H1("Top Players Over The Last 5 Games"),
-    html.Div(player_rows), 
-
-    html.Div(buy_low_section), 
-
-    html.Div(sell_high_section)
-])
+def serve_layout():
+    # called on every page load, so a freshly refreshed snapshot shows up without a restart;
+    # the sections themselves come from the render cache
+    return html.Div([
+        html.Div([
+            html.H1("BoxOut", style={
+                "color": "#000000",
+                "margin": "0",
+                "fontSize": "3rem"
+            })
+        ], style={
+            "backgroundColor": "#FFA500",
+            "padding": "20px 0",
+            "textAlign": "center",
+            "boxShadow": "0px 2px 4px rgba(0,0,0,0.1)",
+            "marginBottom": "20px"
+        }),
+
+        html.H1("Yesterday's Top Performers"),
+
+        html.Div([
+            html.Button("All", id="btn-all", n_clicks=0),
+            html.Button("Guard", id="btn-guard", n_clicks=0),
+            html.Button("Forward", id="btn-forward", n_clicks=0),
+            html.Button("Center", id="btn-center", n_clicks=0)
+        ], style={
+            "textAlign": "center",
+            "marginBottom": "20px",
+            "gap": "10px",
+            "display": "flex",
+            "justifyContent": "center"
+        }),
+
+        html.Div(id="top-player-cards", style={
+            "display": "flex",
+            "flexDirection": "row",
+            "justifyContent": "center",
+            "flexWrap": "wrap",
+            "gap": "10px"
+        }),
+
+        html.Div(prediction_section()),
+
+        html.H1("Model Accuracy: Predicted vs Actual"),
+        pred_vs_actual_graph(),
+
+        html.H1("Top Players Over The Last 5 Games"),
+        html.Div(last_5_rows()),
+
+        html.Div(buy_sell_section("buy_low")),
+
+        html.Div(buy_sell_section("sell_high"))
+    ])
+
+app.layout = serve_layout
+
+@app.server.route("/_cache_stats")
+def cache_stats():
+    # this worker's counters; with a FileCache, size is shared by every worker
+    return render_cache.stats()
 
 @app.callback(
     Output("top-player-cards", "children"),
@@ -378,17 +426,7 @@ def update_top_performers(all_clicks, guard_clicks, forward_clicks, center_click
             "btn-center": "C"
         }.get(button_id, "All")
 
-    df = games_yesterday.copy()
-    df["player_id"] = df.apply(lambda row: get_cached("player_id", row), axis=1)
-    df["image_url"] = df.apply(lambda row: get_cached("image_url", row), axis=1)
-    df["position"] = df.apply(lambda row: get_cached("position", row), axis=1)
-
-    if category != "All":
-        df = df[df["position"].astype(str).str.startswith(category)]
-
-    df = df.sort_values(by="fp", ascending=False).head(5)
-
-    return [create_player_card(row) for _, row in df.iterrows()]
+    return top_performer_cards(category)
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
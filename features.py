@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+# FEATURE KERNELS
+#
+# Shifted (strictly before the current game) rolling and expanding means and
+# variances, plus EWMAs, for many columns and window sizes at once. Rows
+# must be sorted by player and date. Each column is cumulatively summed once
+# per player and every window is then two lookups into those sums, so extra
+# columns or windows cost an array subtraction, not another groupby lambda.
+
+# largest log-scale an EWM weight is allowed to reach before its block is rescaled
+MAX_LOG_SCALE = 600
+
+class GroupLayout:
+    """Where each row of a frame sorted by keys sits inside its group."""
+
+    def __init__(self, df, keys):
+        codes = df.groupby(keys, sort=False).ngroup().to_numpy()
+        first = np.ones(len(codes), dtype=bool)
+        first[1:] = codes[1:] != codes[:-1]
+        self._set_starts(first, df.index)
+
+    @classmethod
+    def from_starts(cls, first, index):
+        """Layout whose groups begin at the rows where first is True."""
+        layout = cls.__new__(cls)
+        layout._set_starts(np.array(first, dtype=bool), index)
+        return layout
+
+    def _set_starts(self, first, index):
+        if len(first):
+            first[0] = True
+        self.group = np.cumsum(first) - 1
+        self.start = np.flatnonzero(first)[self.group]
+        self.position = np.arange(len(first)) - self.start
+        size = np.bincount(self.group)
+        self.from_end = size[self.group] - self.position - 1
+        self.index = index
+
+def _group_cumsum(x, layout):
+    """Inclusive per-group cumulative sums, with a zero row prepended."""
+    sums = pd.DataFrame(x).groupby(layout.group, sort=False).cumsum().to_numpy()
+    return np.vstack([np.zeros((1, x.shape[1])), sums])
+
+def _sums_before(cumsums, layout, window):
+    """Sums over the previous `window` rows of each row's group (all of them if None)."""
+    rows = np.arange(len(layout.start))
+    lo = layout.start if window is None else np.maximum(layout.start, rows - window)
+    upper = np.where((rows > layout.start)[:, None], cumsums[rows], 0.0)
+    lower = np.where((lo > layout.start)[:, None], cumsums[lo], 0.0)
+    return upper - lower
+
+def rolling_features(df, layout, columns, windows, stats=('mean',), min_periods=1, prior=None):
+    """Shifted window statistics named <column>_<stat>_<window> ("all" for window None).
+
+    stats are 'mean', 'var' and 'std' (ddof=1, like pandas). NaNs are
+    skipped. prior optionally carries earlier games into the expanding
+    (window None) statistics: a frame aligned with df holding <column>_sum,
+    <column>_count and, for variances, <column>_sumsq.
+    """
+    x = df[columns].to_numpy(dtype=np.float64)
+    present = ~np.isnan(x)
+    x = np.where(present, x, 0.0)
+    k = len(columns)
+
+    spread = 'var' in stats or 'std' in stats
+    blocks = [x, present.astype(np.float64)]
+    if spread:
+        blocks.append(x * x)
+    cumsums = _group_cumsum(np.hstack(blocks), layout)
+
+    out = {}
+    for window in windows:
+        sums = _sums_before(cumsums, layout, window)
+        total, count = sums[:, :k], sums[:, k:2 * k]
+        squares = sums[:, 2 * k:]
+        if window is None and prior is not None:
+            total = total + _prior(prior, columns, 'sum')
+            count = count + _prior(prior, columns, 'count')
+            if spread:
+                squares = squares + _prior(prior, columns, 'sumsq')
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count >= max(min_periods, 1), total / count, np.nan)
+            results = {'mean': mean}
+            if spread:
+                var = (squares - total * mean) / (count - 1)
+                results['var'] = np.where(count >= max(min_periods, 2), np.maximum(var, 0.0), np.nan)
+                results['std'] = np.sqrt(results['var'])
+
+        label = "all" if window is None else window
+        for stat in stats:
+            values = results[stat]
+            for i, column in enumerate(columns):
+                out[f"{column}_{stat}_{label}"] = values[:, i]
+
+    return pd.DataFrame(out, index=layout.index)
+
+def _prior(prior, columns, field):
+    names = [f"{column}_{field}" for column in columns]
+    return prior.reindex(columns=names).to_numpy(dtype=np.float64, na_value=0.0)
+
+def ewm_features(df, layout, columns, spans):
+    """Shifted exponentially weighted means named <column>_ewm_<span>.
+
+    Same weights as pandas' ewm(span=span, adjust=True) over each player's
+    earlier games, skipping NaNs. Weights are kept relative to the start of
+    each block of games inside a group, short enough that they can't
+    overflow, and each block carries the decayed sums of the ones before it.
+    """
+    x = df[columns].to_numpy(dtype=np.float64)
+    present = ~np.isnan(x)
+    x = np.hstack([np.where(present, x, 0.0), present])
+    k = len(columns)
+    rows = np.arange(len(x))
+
+    out = {}
+    for span in spans:
+        decay = 1 - 2 / (span + 1)
+        block = max(1, int(MAX_LOG_SCALE / -np.log(decay)))
+        segment = layout.position // block
+        offset = layout.position - segment * block
+        segments = GroupLayout.from_starts(offset == 0, layout.index)
+
+        # within a block: sum over earlier rows of x_j * decay**-offset_j
+        cumsums = _group_cumsum(x * decay ** -offset.astype(np.float64)[:, None], segments)
+        within = _sums_before(cumsums, segments, None)
+
+        # carried in from earlier blocks: sum of x_j * decay**(block start - j)
+        carried = np.zeros((segments.group[-1] + 1 if len(x) else 0, x.shape[1]))
+        for n in range(1, segment.max() + 1 if len(x) else 1):
+            starts = rows[(segment == n) & (offset == 0)]
+            previous = segments.group[starts - 1]
+            carried[segments.group[starts]] = decay ** block * (carried[previous] + cumsums[starts])
+
+        sums = decay ** offset.astype(np.float64)[:, None] * (carried[segments.group] + within)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(sums[:, k:] > 0, sums[:, :k] / sums[:, k:], np.nan)
+        for i, column in enumerate(columns):
+            out[f"{column}_ewm_{span}"] = values[:, i]
+
+    return pd.DataFrame(out, index=layout.index)
@@ -1,37 +1,143 @@
+import argparse
+import os
+import time
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import cross_val_score
-from sklearn.ensemble import HistGradientBoostingRegressor
-import mlflow
-import mlflow.sklearn
-
-data = pd.read_csv("model_training_data.csv")
-X = data[['numMinutes', 'opponent_oss', 'recent_avg_fp', 'season_avg_fp', 'bfi']]
-y = data['fp']
-
-# random forest model
-# model = RandomForestRegressor(n_estimators=100, random_state=42)
-
-# alt model
-model = HistGradientBoostingRegressor(random_state=42)
-
-# cross validation yippee
-r2_scores = cross_val_score(model, X, y, cv=5, scoring='r2')
-mae_scores = -cross_val_score(model, X, y, cv=5, scoring='neg_mean_absolute_error')
-mse_scores = -cross_val_score(model, X, y, cv=5, scoring='neg_mean_squared_error')
-
-print("Cross-validated R² scores:", r2_scores)
-print("Mean R²:", r2_scores.mean())
-print("Mean MAE:", mae_scores.mean())
-print("Mean MSE:", mse_scores.mean())
-
-model.fit(X, y)
-
-# log results
-with mlflow.start_run():
-    mlflow.log_param("model_type", "RandomForest")
-    mlflow.log_param("cv_folds", 5)
-    mlflow.log_metric("cv_r2_mean", r2_scores.mean())
-    mlflow.log_metric("cv_r2_std", r2_scores.std())
-    mlflow.log_metric("cv_mae_mean", mae_scores.mean())
-    mlflow.log_metric("cv_mse_mean", mse_scores.mean())
-    mlflow.sklearn.log_model(model, "model")
\ No newline at end of file
+
+# MODEL TRAINING
+#
+# `python ml_model.py` scores the model with a single cross_validate run over
+# time-ordered folds (every metric comes from the same fits, and the folds
+# train in parallel), refits on all the data and logs the run to MLflow.
+# `python ml_model.py --search N` first tries N hyperparameter candidates on a
+# process pool with successive halving: each round drops the weaker half
+# before the rest get more data, and every candidate stops adding trees once
+# its validation loss stalls.
+#
+# scikit-learn and MLflow are imported inside the functions that use them, so
+# importing this module for FEATURES (registry.py does) stays cheap.
+
+TRAINING_DATA = "model_training_data.csv"
+FEATURES = ['numMinutes', 'opponent_oss', 'recent_avg_fp', 'season_avg_fp', 'bfi']
+TARGET = 'fp'
+CV_FOLDS = 5
+N_JOBS = -1
+RANDOM_STATE = 42
+SCORING = {'r2': 'r2', 'mae': 'neg_mean_absolute_error', 'mse': 'neg_mean_squared_error'}
+PARAM_SPACE = {
+    'learning_rate': [0.03, 0.05, 0.1, 0.2],
+    'max_leaf_nodes': [15, 31, 63],
+    'min_samples_leaf': [10, 20, 50],
+    'l2_regularization': [0.0, 0.1, 1.0],
+}
+
+def read_training_data(path=TRAINING_DATA):
+    """The training CSV, or a training store directory written by `process_model_data.py --backfill`."""
+    if os.path.isdir(path):
+        from process_model_data import load_training_store
+        return load_training_store(path)
+    return pd.read_csv(path, parse_dates=['gameDate'])
+
+def load_training_data(path=TRAINING_DATA):
+    """Features and target, oldest game first so the folds respect time."""
+    data = read_training_data(path)
+    data = data.sort_values(by='gameDate', kind='stable').dropna(subset=FEATURES + [TARGET])
+    return data[FEATURES], data[TARGET]
+
+def search_params(X, y, cv, n_candidates, n_jobs=N_JOBS):
+    """Best PARAM_SPACE combination by MAE over the time-ordered folds."""
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    from sklearn.model_selection import HalvingRandomSearchCV
+
+    # 'auto' only holds out an early-stopping split once a fold has more than
+    # 10k rows, so the small early rounds fit every iteration instead of
+    # validating on a handful of samples
+    search = HalvingRandomSearchCV(
+        HistGradientBoostingRegressor(random_state=RANDOM_STATE, early_stopping='auto', max_iter=1000),
+        PARAM_SPACE,
+        n_candidates=n_candidates,
+        cv=cv,
+        scoring='neg_mean_absolute_error',
+        # size the first round so the last one trains on every row
+        min_resources='exhaust',
+        max_resources=len(X),
+        n_jobs=n_jobs,
+        random_state=RANDOM_STATE,
+    )
+    search.fit(X, y)
+
+    scores = np.asarray(search.cv_results_['mean_test_score'], dtype=float)
+    if not np.isfinite(scores).all():
+        raise RuntimeError(
+            f"{np.count_nonzero(~np.isfinite(scores))} of {len(scores)} search scores are not finite "
+            f"(first round trained on {search.min_resources_} rows); not using the search result"
+        )
+    return search.best_estimator_.get_params(), -search.best_score_
+
+def train(n_candidates=0, folds=CV_FOLDS, n_jobs=N_JOBS, promote=False, data=TRAINING_DATA):
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    from sklearn.model_selection import TimeSeriesSplit, cross_validate
+    import mlflow
+    import mlflow.sklearn
+
+    start = time.perf_counter()
+    X, y = load_training_data(data)
+    cv = TimeSeriesSplit(n_splits=folds)
+
+    model = HistGradientBoostingRegressor(random_state=RANDOM_STATE)
+    best_params = {}
+    if n_candidates:
+        params, best_mae = search_params(X, y, cv, n_candidates, n_jobs)
+        best_params = {name: params[name] for name in PARAM_SPACE}
+        model.set_params(**best_params, early_stopping=True, max_iter=params['max_iter'])
+        print("Best parameters:", best_params, f"(search MAE {best_mae:.3f})")
+
+    # one set of fold fits scores every metric
+    scores = cross_validate(model, X, y, cv=cv, scoring=SCORING, n_jobs=n_jobs)
+    r2_scores = scores['test_r2']
+    mae_scores = -scores['test_mae']
+    mse_scores = -scores['test_mse']
+
+    print("Cross-validated R² scores:", r2_scores)
+    print("Mean R²:", r2_scores.mean())
+    print("Mean MAE:", mae_scores.mean())
+    print("Mean MSE:", mse_scores.mean())
+
+    model.fit(X, y)
+
+    # log results
+    with mlflow.start_run() as run:
+        mlflow.log_param("model_type", type(model).__name__)
+        mlflow.log_param("cv_folds", folds)
+        mlflow.log_param("cv_split", "TimeSeriesSplit")
+        mlflow.log_param("training_data", data)
+        mlflow.log_param("training_rows", len(X))
+        if best_params:
+            mlflow.log_param("search_candidates", n_candidates)
+            mlflow.log_params(best_params)
+        mlflow.log_metric("cv_r2_mean", r2_scores.mean())
+        mlflow.log_metric("cv_r2_std", r2_scores.std())
+        mlflow.log_metric("cv_mae_mean", mae_scores.mean())
+        mlflow.log_metric("cv_mse_mean", mse_scores.mean())
+        mlflow.log_metric("train_seconds", time.perf_counter() - start)
+        model_info = mlflow.sklearn.log_model(model, "model", serialization_format="cloudpickle")
+
+    if promote:
+        import registry
+        # evaluated on the same data it was trained on
+        registry.promote(model_info.model_uri, model_id=run.info.run_id, training_data=data)
+
+    return model
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and log the fantasy points model.")
+    parser.add_argument("--search", type=int, default=0, metavar="N",
+                        help="try N hyperparameter candidates before training (default: none)")
+    parser.add_argument("--folds", type=int, default=CV_FOLDS)
+    parser.add_argument("--jobs", type=int, default=N_JOBS, help="parallel workers, -1 for every core")
+    parser.add_argument("--promote", action="store_true", help="make the trained model the registry's current one")
+    parser.add_argument("--data", default=TRAINING_DATA,
+                        help="training CSV, or the training_data/ store written by process_model_data.py --backfill")
+    args = parser.parse_args()
+    train(args.search, args.folds, args.jobs, args.promote, args.data)
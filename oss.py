@@ -1,41 +1,186 @@
+import numpy as np
 import pandas as pd
 import json
-from datetime import datetime, timedelta
-import kagglehub
 import os
+import sys
+from box_scores import load_box_scores
+from players import load_players, attach_players
+from scoring import STAT_COLUMNS, PROFILES, fantasy_points
+from tracing import current_span, traced
+
+# OPPONENT STRENGTH (OSS)
+#
+# How much each team allows to each position: the mean of a stat over every
+# player-game against that opponent in the last WINDOW_DAYS. `python oss.py`
+# rebuilds from the box-score store; `python oss.py --incremental` keeps
+# per (gameDate, opponent, position) sums and counts in STATE_FILE, adds only
+# games after the last one seen, drops games that fell out of the longest
+# window and re-derives every window from those running sums.
 
 CACHE_FILE = "opponent_strength_cache.json"
-BASE_PATH = kagglehub.dataset_download("eoinamoore/historical-nba-data-and-player-box-scores")
-STATS_CSV = os.path.join(BASE_PATH, "PlayerStatistics.csv")
+VARIANTS_FILE = "opponent_strength_variants.json"
+STATE_FILE = "oss_state.json"
+WINDOW_DAYS = 30
+# CACHE_FILE is METRIC over WINDOW_DAYS, which is what the model was trained
+# on; VARIANTS_FILE holds every METRICS x WINDOWS combination
+METRIC = "points"
+METRICS = ["points"] + list(PROFILES)
+WINDOWS = [7, 14, WINDOW_DAYS]
+BUCKET_KEYS = ['gameDate', 'opponentteamName', 'position']
+
+def load_oss_cache(path=CACHE_FILE):
+    with open(path, "r") as f:
+        return json.load(f)
+
+def map_oss(teams, positions, oss_cache):
+    """Vectorized oss_cache[team][position] lookup; missing pairs come back as NaN."""
+    table = pd.Series({
+        (team, pos): value
+        for team, values in oss_cache.items()
+        for pos, value in values.items()
+    }, dtype=float)
+    keys = pd.MultiIndex.from_arrays([pd.Series(teams).astype(object), pd.Series(positions).astype(object)])
+    return table.reindex(keys).values
+
+@traced()
+def load_games(start):
+    nba = load_box_scores(
+        columns=['personId', 'gameDate', 'opponentteamName', 'numMinutes'] + STAT_COLUMNS,
+        start=start
+    )
+    return nba[nba["numMinutes"] > 0]
+
+@traced()
+def bucket_games(nba, players):
+    """Per (gameDate, opponent, position) sum and count of every METRICS value."""
+    current_span().rows = len(nba)
+    profiles = [m for m in METRICS if m in PROFILES]
+    nba = nba.assign(**dict(zip(profiles, fantasy_points(nba, profiles).T)))
+
+    nba = attach_players(nba, ['position'], players)
+    nba = nba[nba['position'].notna()]
+    nba = nba.assign(position=nba['position'].astype(str).str.split("-"))
+    nba = nba.explode('position')
+
+    grouped = nba.groupby(BUCKET_KEYS)[METRICS]
+    buckets = grouped.sum().add_suffix('_sum').join(grouped.count().add_suffix('_count'))
+    return buckets.reset_index()
+
+def oss_table(buckets, metric, window_days, now):
+    """{team: {position: mean metric allowed}} over games since now - window_days."""
+    recent = buckets[buckets['gameDate'] >= now - pd.Timedelta(days=window_days)]
+    totals = recent.groupby(['opponentteamName', 'position'])[[f"{metric}_sum", f"{metric}_count"]].sum()
+    means = (totals[f"{metric}_sum"] / totals[f"{metric}_count"]).rename('avg_fp_allowed').reset_index()
+
+    pivot = means.pivot(index='opponentteamName', columns='position', values='avg_fp_allowed').fillna(0)
+    return pivot.to_dict(orient='index')
+
+def oss_as_of(buckets, teams, positions, dates, metric=METRIC, window_days=WINDOW_DAYS):
+    """Vectorized OSS of each (team, position) as it stood on each date.
+
+    Same numbers oss_table gives, but over the window_days before every row's
+    own game day (that day excluded), so historical rows only see earlier
+    games. Like the cache, a team with games in the window but none against
+    the position gets 0; a team without games gets NaN.
+    """
+    days = buckets['gameDate'].dt.normalize()
+    daily = buckets.groupby([days, 'opponentteamName', 'position'])[[f"{metric}_sum", f"{metric}_count"]].sum()
+    sums = daily[f"{metric}_sum"].unstack(['opponentteamName', 'position'], fill_value=0).sort_index()
+    counts = daily[f"{metric}_count"].unstack(['opponentteamName', 'position'], fill_value=0).reindex_like(sums)
+    team_counts = counts.T.groupby(level='opponentteamName').sum().T
+
+    # cumulative totals per day, with a zero row so "before the first day" is row 0
+    def cumulative(frame):
+        return np.vstack([np.zeros((1, frame.shape[1])), frame.to_numpy(dtype=float).cumsum(axis=0)])
+
+    day_index = sums.index.values
+    query_days = pd.to_datetime(pd.Series(dates)).dt.normalize().values
+    hi = np.searchsorted(day_index, query_days, side='left')
+    lo = np.searchsorted(day_index, query_days - np.timedelta64(window_days, 'D'), side='left')
+
+    keys = pd.MultiIndex.from_arrays([pd.Series(teams).astype(object), pd.Series(positions).astype(object)])
+    col = sums.columns.get_indexer(keys)
+    team_col = team_counts.columns.get_indexer(pd.Series(teams).astype(object))
+
+    def windowed(cum, columns):
+        safe = np.maximum(columns, 0)
+        totals = cum[hi, safe] - cum[lo, safe]
+        return np.where(columns >= 0, totals, 0.0)
+
+    total = windowed(cumulative(sums), col)
+    count = windowed(cumulative(counts), col)
+    team_count = windowed(cumulative(team_counts), team_col)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(count > 0, total / count, 0.0)
+    return np.where(team_count > 0, means, np.nan)
+
+def _write_json(path, data, **kwargs):
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp_file, path)
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return None
+    with open(STATE_FILE, "r") as f:
+        state = json.load(f)
+    buckets = pd.DataFrame(state['buckets'])
+    if buckets.empty or set(buckets.columns) != set(BUCKET_KEYS + _value_columns()):
+        return None  # written with a different METRICS list; rebuild
+    buckets['gameDate'] = pd.to_datetime(buckets['gameDate'])
+    return pd.Timestamp(state['last_game_date']), buckets
+
+def _value_columns():
+    return [f"{m}_sum" for m in METRICS] + [f"{m}_count" for m in METRICS]
 
-nba = pd.read_csv(STATS_CSV, low_memory=False)
-nba['gameDate'] = pd.to_datetime(nba['gameDate'])
-nba = nba[nba['gameDate'] >= pd.Timestamp.today() - pd.Timedelta(days=30)]
-nba = nba[nba["numMinutes"] > 0]
+@traced()
+def save_caches(buckets, last_game_date, now):
+    variants = {
+        metric: {str(window): oss_table(buckets, metric, window, now) for window in WINDOWS}
+        for metric in METRICS
+    }
+    oss_dict = variants[METRIC][str(WINDOW_DAYS)]
 
-with open("player_lookup_cache.json", "r") as f:
-    player_lookup = json.load(f)
+    _write_json(CACHE_FILE, oss_dict, indent=2)
+    _write_json(VARIANTS_FILE, variants)
+    _write_json(STATE_FILE, {
+        "last_game_date": pd.Timestamp(last_game_date).isoformat(),
+        "buckets": json.loads(buckets.to_json(orient='records', date_format='iso')),
+    })
+    return oss_dict
 
-def get_cached_position(row):
-    key = f"{row['firstName']} {row['lastName']}"
-    return player_lookup.get(key, {}).get("position")
+@traced()
+def build_oss_cache():
+    now = pd.Timestamp.today()
+    nba = load_games(now - pd.Timedelta(days=max(WINDOWS)))
+    buckets = bucket_games(nba, load_players())
 
-nba['position'] = nba.apply(get_cached_position, axis=1)
-nba = nba[nba['position'].notna()]
-nba = nba.assign(position=nba['position'].str.split("-"))
-nba = nba.explode('position')
+    oss_dict = save_caches(buckets, nba['gameDate'].max(), now)
+    print(f"Opponent strength cache saved with {len(oss_dict)} teams → {CACHE_FILE}")
 
-grouped = (
-    nba.groupby(['opponentteamName', 'position'])['points']
-    .mean()
-    .reset_index()
-    .rename(columns={'points': 'avg_fp_allowed'})
-)
+@traced()
+def update_oss_cache():
+    state = load_state()
+    if state is None:
+        print(f"No usable {STATE_FILE} found, running a full rebuild.")
+        return build_oss_cache()
 
-pivot = grouped.pivot(index='opponentteamName', columns='position', values='avg_fp_allowed').fillna(0)
-oss_dict = pivot.to_dict(orient='index')
+    now = pd.Timestamp.today()
+    last_game_date, buckets = state
+    nba = load_games(last_game_date)
+    nba = nba[nba['gameDate'] > last_game_date]
+    if not nba.empty:
+        buckets = pd.concat([buckets, bucket_games(nba, load_players())], ignore_index=True)
+        last_game_date = nba['gameDate'].max()
+    buckets = buckets[buckets['gameDate'] >= now - pd.Timedelta(days=max(WINDOWS))]
 
-with open(CACHE_FILE, "w") as f:
-    json.dump(oss_dict, f, indent=2)
+    oss_dict = save_caches(buckets, last_game_date, now)
+    print(f"Opponent strength cache updated with {len(nba)} new rows, {len(oss_dict)} teams → {CACHE_FILE}")
 
-print(f"Opponent strength cache saved with {len(oss_dict)} teams → {CACHE_FILE}")
+if __name__ == "__main__":
+    if "--incremental" in sys.argv[1:]:
+        update_oss_cache()
+    else:
+        build_oss_cache()
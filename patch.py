@@ -1,16 +1,27 @@
-from nba_api.stats.static import players
-from nba_api.stats.endpoints import commonplayerinfo
 import json
-import pandas as pd
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-CACHE_FILE = "player_lookup_cache.json"
-
-with open(CACHE_FILE, "r") as f:
-    player_lookup = json.load(f)
+# POSITION BACKFILL
+#
+# Fills in missing positions in the player lookup cache from nba_api's
+# CommonPlayerInfo. Requests go through a shared token bucket so a small
+# thread pool stays under the API's rate limit, failed calls are retried with
+# exponential backoff, and every position found is appended to JOURNAL_FILE
+# straight away so a crashed or interrupted run resumes where it left off.
+# Players whose position can't be mapped are journaled as UNKNOWN and kept
+# in the journal after the cache is written, so later runs don't ask again.
 
-active_players = players.get_active_players()
-active_df = pd.DataFrame(active_players)
+CACHE_FILE = "player_lookup_cache.json"
+JOURNAL_FILE = "position_backfill.jsonl"
+REQUESTS_PER_SECOND = 1 / 1.2
+MAX_WORKERS = 4
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 2.0
+# journaled for players whose POSITION has no G/F/C, so a resumed run skips them
+UNKNOWN = "unknown"
 
 def simplify_position(pos_str):
     """Map full position strings to G, F, C."""
@@ -24,26 +35,143 @@ def simplify_position(pos_str):
         parts.append("C")
     return "-".join(parts) if parts else None
 
-updated = False
-for full_name, info in player_lookup.items():
-    if not info.get("position"):
-        match = active_df[active_df["full_name"] == full_name]
-        if not match.empty:
-            player_id = match.iloc[0]["id"]
+class TokenBucket:
+    """Blocking token bucket: at most `rate` acquisitions per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class Journal:
+    """Append-only JSON-lines record of positions fetched so far."""
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def read(self):
+        found = {}
+        if not os.path.exists(self.path):
+            return found
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash mid-write
+                found[record["name"]] = record["position"]
+        return found
+
+    def append(self, name, position):
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"name": name, "position": position}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self, keep_unknown=False):
+        """Drop the journal; keep_unknown keeps the UNKNOWN records, which never reach the cache."""
+        unknown = [name for name, position in self.read().items() if position == UNKNOWN] if keep_unknown else []
+        if not unknown:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, "w") as f:
+            for name in unknown:
+                f.write(json.dumps({"name": name, "position": UNKNOWN}) + "\n")
+        os.replace(tmp_file, self.path)
+
+def fetch_position(player_id):
+    from nba_api.stats.endpoints import commonplayerinfo
+    return commonplayerinfo.CommonPlayerInfo(player_id=player_id).get_data_frames()[0].loc[0, "POSITION"]
+
+def active_player_ids():
+    from nba_api.stats.static import players
+    return {p["full_name"]: p["id"] for p in players.get_active_players()}
+
+def backfill_positions(player_lookup, player_ids, fetch=fetch_position, journal=None,
+                       rate=REQUESTS_PER_SECOND, max_workers=MAX_WORKERS,
+                       max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS):
+    """Fill missing positions in player_lookup in place; returns the names updated.
+
+    player_ids maps full names to nba_api player ids. fetch(player_id) returns
+    the raw POSITION string and can be swapped for a local stub.
+    """
+    journal = journal or Journal()
+    updated = []
+
+    # resume: positions already fetched by an earlier run
+    journaled = journal.read()
+    for name, position in journaled.items():
+        if position != UNKNOWN and name in player_lookup and not player_lookup[name].get("position"):
+            player_lookup[name]["position"] = position
+            updated.append(name)
+
+    missing = [
+        name for name, info in player_lookup.items()
+        if not info.get("position") and name in player_ids and journaled.get(name) != UNKNOWN
+    ]
+    if not missing:
+        return updated
+
+    bucket = TokenBucket(rate)
+
+    def fetch_one(name):
+        for attempt in range(max_retries + 1):
+            bucket.acquire()
             try:
-                pos_raw = commonplayerinfo.CommonPlayerInfo(player_id=player_id).get_data_frames()[0].loc[0, "POSITION"]
-                pos_clean = simplify_position(pos_raw)
-                if pos_clean:
-                    player_lookup[full_name]["position"] = pos_clean
-                    updated = True
-                    print(f"Updated {full_name}: {pos_clean}")
+                pos_clean = simplify_position(fetch(player_ids[name]))
+                break
             except Exception as e:
-                print(f"Failed to fetch position for {full_name}: {e}")
-            time.sleep(1.2)
-
-if updated:
-    with open(CACHE_FILE, "w") as f:
-        json.dump(player_lookup, f, indent=2)
-    print("Cache updated.")
-else:
-    print("No missing positions found or updated.")
+                if attempt == max_retries:
+                    print(f"Failed to fetch position for {name}: {e}")
+                    return None
+                time.sleep(backoff * 2 ** attempt)
+
+        journal.append(name, pos_clean or UNKNOWN)
+        if pos_clean:
+            print(f"Updated {name}: {pos_clean}")
+        else:
+            print(f"No G/F/C position for {name}, skipping it from now on")
+        return pos_clean
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for name, pos_clean in zip(missing, pool.map(fetch_one, missing)):
+            if pos_clean:
+                player_lookup[name]["position"] = pos_clean
+                updated.append(name)
+
+    return updated
+
+if __name__ == "__main__":
+    with open(CACHE_FILE, "r") as f:
+        player_lookup = json.load(f)
+
+    journal = Journal()
+    updated = backfill_positions(player_lookup, active_player_ids(), journal=journal)
+
+    if updated:
+        tmp_file = f"{CACHE_FILE}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(player_lookup, f, indent=2)
+        os.replace(tmp_file, CACHE_FILE)
+        journal.clear(keep_unknown=True)
+        print("Cache updated.")
+    else:
+        print("No missing positions found or updated.")
@@ -0,0 +1,77 @@
+import json
+import os
+import pandas as pd
+
+# PLAYER DIMENSION
+#
+# One row per player keyed by personId, built from player_lookup_cache.json.
+# Scripts attach player attributes with a single vectorized map instead of
+# building "First Last" strings and looking every row up in the JSON dict.
+# The cache only covers this season's players; load_all_players() adds
+# everyone in the dataset's Players.csv, for work on past seasons.
+
+CACHE_FILE = "player_lookup_cache.json"
+FIELDS = ['position', 'primary_position', 'image_url', 'season_fp', 'games_played', 'avg_fp']
+
+def players_from_lookup(player_lookup):
+    players = (
+        pd.DataFrame.from_dict(player_lookup, orient='index')
+        .rename_axis('full_name')
+        .reset_index()
+    )
+    names = players['full_name'].str.split(' ', n=1, expand=True)
+    players['firstName'] = names[0]
+    players['lastName'] = names[1]
+    players['personId'] = pd.to_numeric(players['player_id']).astype('int64')
+    players['position'] = players['position'].astype('category')
+    players['primary_position'] = players['position'].astype('string').str[0].astype('category')
+
+    players = players.drop_duplicates(subset='personId').set_index('personId')
+    return players[['full_name', 'firstName', 'lastName'] + FIELDS]
+
+def load_players(path=CACHE_FILE):
+    with open(path, "r") as f:
+        return players_from_lookup(json.load(f))
+
+def position_from_flags(df):
+    """'G', 'G-F', 'F-C', ... from Players.csv's guard/forward/center flags; NaN when none is set."""
+    roles = (
+        df["guard"].astype(bool).map({True: "G", False: ""}) + "-" +
+        df["forward"].astype(bool).map({True: "F", False: ""}) + "-" +
+        df["center"].astype(bool).map({True: "C", False: ""})
+    ).str.replace(r"-+", "-", regex=True).str.strip("-")
+    return roles.where(roles != "")
+
+def load_all_players(csv_path=None, path=CACHE_FILE):
+    """Every player in Players.csv with the cache's columns; positions in the cache win."""
+    if csv_path is None:
+        from box_scores import dataset_path
+        csv_path = os.path.join(dataset_path(), "Players.csv")
+    listed = pd.read_csv(csv_path).drop_duplicates(subset='personId').set_index('personId')
+    position = position_from_flags(listed)
+    if os.path.exists(path):
+        cached = load_players(path)['position'].astype(object)
+        position = cached.reindex(listed.index).where(lambda p: p.notna(), position)
+
+    players = pd.DataFrame(index=listed.index, columns=['full_name', 'firstName', 'lastName'] + FIELDS)
+    players['firstName'] = listed['firstName']
+    players['lastName'] = listed['lastName']
+    players['full_name'] = listed['firstName'] + ' ' + listed['lastName']
+    players['position'] = position.astype('category')
+    players['primary_position'] = position.astype('string').str[0].astype('category')
+    return players
+
+def attach_players(df, fields, players):
+    """Return df with the given player fields added as columns.
+
+    Joins on personId when df has it, otherwise on the "First Last" name the
+    lookup cache is keyed by (e.g. for model_training_data.csv).
+    """
+    if 'personId' in df.columns:
+        key = df['personId']
+        attrs = players[fields]
+    else:
+        key = df['firstName'] + ' ' + df['lastName']
+        attrs = players.set_index('full_name')[fields]
+
+    return df.assign(**{field: key.map(attrs[field]) for field in fields})
@@ -1,11 +1,6 @@
 import pandas as pd
-import mlflow
-import mlflow.sklearn
-from sklearn.model_selection import train_test_split
-from sklearn.model_selection import TimeSeriesSplit
-from sklearn.metrics import r2_score, mean_absolute_error
 import plotly.express as px
-from dash import dcc
+from registry import current_evaluation
 
 # def create_pred_vs_actual_plot():
 #     # Load data and model
@@ -58,52 +53,31 @@ from dash import dcc
 
 #     return dcc.Graph(figure=fig)
 
-def create_pred_vs_actual_plot():
-    # Load and sort the data by time
-    data = pd.read_csv("model_training_data.csv")
-    data['gameDate'] = pd.to_datetime(data['gameDate'])
-    data = data.sort_values(by='gameDate')
-
-    # Drop rows with missing or lagged features (due to .shift or rolling avg)
-    feature_cols = ['numMinutes', 'opponent_oss', 'recent_avg_fp', 'season_avg_fp', 'bfi']
-    data = data.dropna(subset=feature_cols + ['fp'])
-
-    X = data[feature_cols]
-    y = data['fp']
-
-    # Load the MLflow model
-    # model = mlflow.sklearn.load_model("mlruns/0/af2b1d37cbd44718ab497471c47deef9/artifacts/model")
-    model = mlflow.sklearn.load_model("mlruns/0/a5cefbc637fe4c24b6d693e303f11826/artifacts/model")
-
-    # Use TimeSeriesSplit: take the last split
-    tscv = TimeSeriesSplit(n_splits=5)
-    for train_index, test_index in tscv.split(X):
-        pass  # This gets us the final (most realistic) train/test split
-
-    X_train, X_test = X.iloc[train_index], X.iloc[test_index]
-    y_train, y_test = y.iloc[train_index], y.iloc[test_index]
-
-    # Predict
-    y_pred = model.predict(X_test)
-
-    # Evaluation metrics
-    r2 = r2_score(y_test, y_pred)
-    mae = mean_absolute_error(y_test, y_pred)
+def create_pred_vs_actual_figure(evaluation=None):
+    # Evaluation of the current model, computed once when it was promoted
+    evaluation = evaluation or current_evaluation()
+    r2 = evaluation["r2"]
+    mae = evaluation["mae"]
 
     # Create a DataFrame for plotting
     df = pd.DataFrame({
-        'Actual Fantasy Points': y_test.values,
-        'Predicted Fantasy Points': y_pred
+        'Actual Fantasy Points': evaluation["actual"],
+        'Predicted Fantasy Points': evaluation["predicted"]
     })
 
-    # Interactive Plotly scatter plot with regression line
+    # Interactive Plotly scatter plot with the stored regression line
     fig = px.scatter(
         df,
         x='Actual Fantasy Points',
         y='Predicted Fantasy Points',
         title="Predicted vs Actual Fantasy Points (Time-Aware Split)",
-        labels={"Actual Fantasy Points": "Actual FP", "Predicted Fantasy Points": "Predicted FP"},
-        trendline="ols"
+        labels={"Actual Fantasy Points": "Actual FP", "Predicted Fantasy Points": "Predicted FP"}
+    )
+    trend_x = [df['Actual Fantasy Points'].min(), df['Actual Fantasy Points'].max()]
+    fig.add_scatter(
+        x=trend_x,
+        y=[evaluation["trend"]["slope"] * x + evaluation["trend"]["intercept"] for x in trend_x],
+        mode="lines", name="OLS trendline", showlegend=False
     )
 
     # Add annotation with R² and MAE
@@ -122,4 +96,8 @@ def create_pred_vs_actual_plot():
         margin=dict(t=60, b=40, l=60, r=40)
     )
 
-    return dcc.Graph(figure=fig)
\ No newline at end of file
+    return fig
+
+def create_pred_vs_actual_plot():
+    from dash import dcc
+    return dcc.Graph(figure=create_pred_vs_actual_figure())
\ No newline at end of file
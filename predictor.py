@@ -1,161 +1,196 @@
+import numpy as np
 import pandas as pd
 import json
-import mlflow.sklearn
-import kagglehub
 import os
+import threading
 from datetime import date, datetime, timedelta
-
-path = kagglehub.dataset_download("eoinamoore/historical-nba-data-and-player-box-scores")
+from players import load_players, attach_players
+from oss import load_oss_cache, map_oss
+from schedule import ScheduleIndex
+from box_scores import dataset_path
+from tracing import stage, traced
+import registry
+
+TRAINING_DATA = "model_training_data.csv"
+FEATURES = ['numMinutes', 'opponent_oss', 'recent_avg_fp', 'season_avg_fp', 'bfi']
+OUTPUT_COLUMNS = [
+    "firstName", "lastName", "playerteamName", "opponentteamName",
+    "predicted_fp", "season_avg_fp", "diff_from_season_avg",
+    "image_url", "oss_message"
+]
+
+def _default_schedule():
+    return os.path.join(dataset_path(), "LeagueSchedule24_25.csv")
+
+def _signature(file_path):
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+class Predictor:
+    """Long-lived predictor: loads the model and feature tables once.
+
+    Every artifact is tracked by (mtime, size); predict() reloads only the
+    pieces whose files changed since the last call.
+    """
+
+    def __init__(self, model_file=registry.CURRENT_FILE, training_data=TRAINING_DATA,
+                 schedule_file=None, teams_file="teams.json"):
+        self.sources = {
+            # the registry pointer; promoting another run swaps the model in
+            "model": model_file,
+            "stats": training_data,
+            "players": "player_lookup_cache.json",
+            "oss": "opponent_strength_cache.json",
+            "teams": teams_file,
+            "schedule": schedule_file or _default_schedule(),
+        }
+        # the default schedule follows the dataset to newer versions
+        self.follow_dataset = schedule_file is None
+        self.signatures = {}
+        self.lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        with self.lock:
+            if self.follow_dataset:
+                self.sources["schedule"] = _default_schedule()
+            changed = {
+                name for name, file_path in self.sources.items()
+                if _signature(file_path) != self.signatures.get(name, 0)
+            }
+            if not changed:
+                return changed
+
+            with stage("predictor_refresh"):
+                if "model" in changed:
+                    with stage("load_model"):
+                        self.model = registry.load_current(self.sources["model"])
+                if "players" in changed:
+                    self.players = load_players(self.sources["players"])
+                if "oss" in changed:
+                    self.oss_cache = load_oss_cache(self.sources["oss"])
+                    # OSS rank of each team per position, higher = easier matchup
+                    self.oss_rankings = (
+                        pd.DataFrame.from_dict(self.oss_cache, orient='index')
+                        .rank(ascending=False, method='first')
+                        .to_dict(orient='index')
+                    )
+                if "teams" in changed:
+                    with open(self.sources["teams"], "r") as f:
+                        team_mappings = json.load(f)
+                    self.teamid_to_simple = {entry["teamId"]: entry["simpleName"] for entry in team_mappings}
+                if changed & {"schedule", "teams"}:
+                    self.schedule = ScheduleIndex.from_csv(self.sources["schedule"], self.teamid_to_simple)
+                if "stats" in changed:
+                    self.player_features = self._build_player_features()
+
+            for name in changed:
+                self.signatures[name] = _signature(self.sources[name])
+            return changed
+
+    def _build_player_features(self):
+        # Load historical player game data
+        stats = pd.read_csv(self.sources["stats"])
+        stats['gameDate'] = pd.to_datetime(stats['gameDate'])
+        stats = stats.sort_values(by=['personId', 'gameDate'], kind='stable')
+
+        # Features per player-team stint, so a date only needs to pick the stints of teams playing
+        stint = ['personId', 'playerteamName']
+        last_5 = stats.groupby(stint).tail(5)
+        recent = last_5.groupby(stint).agg(
+            recent_avg_fp=('fp', 'mean'),
+            numMinutes=('numMinutes', 'mean'),
+            played=('numMinutes', lambda x: (x > 0).sum()),
+        )
+        season = stats.groupby(stint).agg(
+            firstName=('firstName', 'last'), lastName=('lastName', 'last'),
+            season_avg_fp=('fp', 'mean'), last_game=('gameDate', 'max'),
+        )
+        features = season.join(recent).reset_index()
+
+        # Remove players who logged 0 minutes in 2+ of their last 5 games
+        features = features[features['played'] >= 4].drop(columns='played')
+        return features.sort_values(by=['firstName', 'lastName', 'personId', 'last_game']).reset_index(drop=True)
+
+    def predict(self, game_date, players=None):
+        """Score every active player whose team plays on game_date.
+
+        players optionally restricts the output to an iterable of personIds.
+        Returns the full table sorted by predicted_fp, best first.
+        """
+        return self.predict_range(game_date, game_date, players)
+
+    @traced()
+    def predict_range(self, start, end, players=None):
+        """Score every scheduled player-game with start <= game day <= end in one pass.
+
+        Returns one row per player per game day (game_day, home and tipoff
+        included), sorted by predicted_fp, best first.
+        """
+        self.refresh()
+
+        games = self.schedule.between(start, end)
+        games = games.loc[games['teamName'].notna(), ['game_day', 'teamName', 'opponentteamName', 'home', 'tipoff']]
+
+        # every stint of a team playing in the range, crossed with that team's games
+        df = self.player_features.merge(games, left_on='playerteamName', right_on='teamName').drop(columns='teamName')
+        if players is not None:
+            df = df[df['personId'].isin(set(players))]
+
+        # latest stint per player among the teams playing each day
+        df = (
+            df.sort_values(by=['personId', 'last_game'], kind='stable')
+            .drop_duplicates(subset=['personId', 'game_day'], keep='last')
+        )
+
+        # Add opponent OSS, image and position from the player dimension, by personId
+        df = attach_players(df, ['position', 'primary_position', 'image_url'], self.players)
+        df["opponent_oss"] = map_oss(df["opponentteamName"], df["primary_position"], self.oss_cache)
+        df = df[df["opponent_oss"].notna()].copy()
+
+        rank = pd.Series(map_oss(df["opponentteamName"], df["primary_position"], self.oss_rankings), index=df.index)
+        opponent = df["opponentteamName"].astype(str)
+        df["oss_message"] = np.where(
+            rank.notna(),
+            opponent + " allow " + rank.fillna(0).astype(int).astype(str) + "ᵗʰ highest FP to " + df["position"].astype(str) + "s",
+            "vs. " + opponent
+        )
+        df.loc[df["opponent_oss"] == 0, "oss_message"] = ""
+
+        # Final features
+        df["bfi"] = 0.0  # Placeholder
+        df = df.dropna(subset=FEATURES)
+
+        if df.empty:
+            df["predicted_fp"] = pd.Series(dtype=float)
+        else:
+            df["predicted_fp"] = self.model.predict(df[FEATURES])
+        df["diff_from_season_avg"] = df["predicted_fp"] - df["season_avg_fp"]
+
+        return df.sort_values(by=["predicted_fp", "game_day"], ascending=[False, True]).reset_index(drop=True)
+
+_predictor = None
+_predictor_lock = threading.Lock()
+
+def get_predictor():
+    global _predictor
+    with _predictor_lock:
+        if _predictor is None:
+            _predictor = Predictor()
+    return _predictor
 
 def get_tomorrows_predictions():
-    # Load caches and mappings
-    with open("player_lookup_cache.json", "r") as f:
-        player_lookup = json.load(f)
-    with open("opponent_strength_cache.json", "r") as f:
-        oss_cache = json.load(f)
-    with open("teams.json", "r") as f:
-        team_mappings = json.load(f)
-
-    teamid_to_simple = {entry["teamId"]: entry["simpleName"] for entry in team_mappings}
-    simple_to_teamid = {entry["simpleName"]: entry["teamId"] for entry in team_mappings}
-
-    # Load schedule and figure out tomorrow (skewed by 16 hours)
-    schedule = pd.read_csv(os.path.join(path, "LeagueSchedule24_25.csv"))
-    schedule['gameDateTimeEst'] = pd.to_datetime(schedule['gameDateTimeEst'])
-
     adjusted_now = datetime.now() - timedelta(hours=16)
     # tomorrow = adjusted_now.date() + timedelta(days=1)
     tomorrow = date(2025, 4, 13) # last day of the season, reset this once the new season starts
 
-    tomorrow_games = schedule[schedule['gameDateTimeEst'].dt.date == tomorrow]
-    team_ids = set(tomorrow_games['hometeamId']).union(set(tomorrow_games['awayteamId']))
-    team_names = {teamid_to_simple[tid] for tid in team_ids if tid in teamid_to_simple}
-
-    # Load historical player game data
-    stats = pd.read_csv("model_training_data.csv")
-    stats['gameDate'] = pd.to_datetime(stats['gameDate'])
-
-    # Only consider players from teams playing tomorrow
-    latest_games = stats[stats['playerteamName'].isin(team_names)].copy()
-    latest_games.sort_values(by=['firstName', 'lastName', 'gameDate'], inplace=True)
-
-    # Get last 5 games per player
-    last_5 = latest_games.groupby(['firstName', 'lastName']).tail(5).copy()
-
-    # Remove players who logged 0 minutes in 2+ of their last 5 games
-    last_5.loc[:, 'played'] = last_5['numMinutes'] > 0
-    play_counts = last_5.groupby(['firstName', 'lastName'])['played'].sum().reset_index()
-    active_players = play_counts[play_counts['played'] >= 4][['firstName', 'lastName']]
-
-    # Keep only active players' most recent entry
-    df = latest_games.drop_duplicates(subset=['firstName', 'lastName'], keep='last')
-    df = pd.merge(df, active_players, on=['firstName', 'lastName'], how='inner').copy()
-
-    # Compute average stats
-    five_game_avg_fp = (
-        last_5.groupby(['firstName', 'lastName'])['fp']
-        .mean().reset_index().rename(columns={'fp': 'recent_avg_fp'})
-    )
-    season_avg_fp = (
-        latest_games.groupby(['firstName', 'lastName'])['fp']
-        .mean().reset_index().rename(columns={'fp': 'season_avg_fp'})
-    )
-    avg_minutes = (
-        last_5.groupby(['firstName', 'lastName'])['numMinutes']
-        .mean().reset_index().rename(columns={'numMinutes': 'numMinutes'})
-    )
-
-    # Merge in averages
-    df.drop(columns=['numMinutes', 'recent_avg_fp', 'season_avg_fp'], errors='ignore', inplace=True)
-    df = df.merge(five_game_avg_fp, on=['firstName', 'lastName'], how='left')
-    df = df.merge(season_avg_fp, on=['firstName', 'lastName'], how='left')
-    df = df.merge(avg_minutes, on=['firstName', 'lastName'], how='left')
-
-    # Determine opponent team
-    def find_opponent(team_name):
-        team_id = simple_to_teamid.get(team_name)
-        row = tomorrow_games[
-            (tomorrow_games['hometeamId'] == team_id) | (tomorrow_games['awayteamId'] == team_id)
-        ]
-        if not row.empty:
-            home = row.iloc[0]['hometeamId']
-            away = row.iloc[0]['awayteamId']
-            opp_id = away if home == team_id else home
-            return teamid_to_simple.get(opp_id)
-        return None
-
-    df.loc[:, 'opponentteamName'] = df['playerteamName'].apply(find_opponent)
-
-    # Add opponent OSS
-    def get_oss(row):
-        key = f"{row['firstName']} {row['lastName']}"
-        pos = player_lookup.get(key, {}).get("position")
-        team = row["opponentteamName"]
-        if pos and team:
-            return oss_cache.get(team, {}).get(pos[0])
-        return None
+    df = get_predictor().predict(tomorrow)
 
-    df.loc[:, "opponent_oss"] = df.apply(get_oss, axis=1)
-    df = df[df["opponent_oss"].notna()].copy()
-
-    # Add image, position, and OSS message
-    def get_image_url(row):
-        name = f"{row['firstName']} {row['lastName']}"
-        return player_lookup.get(name, {}).get("image_url")
-
-    def get_position(row):
-        name = f"{row['firstName']} {row['lastName']}"
-        return player_lookup.get(name, {}).get("position")
-    
-    # compute oss rankings for message
-    oss_rankings = {}
-    for pos in ['G', 'F', 'C']:
-        team_values = [
-            (team, values.get(pos))
-            for team, values in oss_cache.items()
-            if values.get(pos) is not None
-        ]
-        team_values = sorted(team_values, key=lambda x: x[1], reverse=True)  # Higher = easier matchup
-        oss_rankings[pos] = {team: rank + 1 for rank, (team, _) in enumerate(team_values)}
-
-    def get_oss_message(row):
-        pos = row.get("position")
-        team = row.get("opponentteamName")
-        oss = row.get("opponent_oss")
-
-        position_key = pos[0] if isinstance(pos, str) and len(pos) > 0 else None
-        if position_key and team and oss:
-            rank = oss_rankings.get(position_key, {}).get(team)
-            if rank:
-                return f"{team} allow {rank}ᵗʰ highest FP to {pos}s"
-            else:
-                return f"vs. {team}"
-        return ""
-    
-    df.loc[:, "image_url"] = df.apply(get_image_url, axis=1)
-    df.loc[:, "position"] = df.apply(get_position, axis=1)
-    df["oss_message"] = df.apply(get_oss_message, axis=1)
-
-    # Final features
-    df.loc[:, "bfi"] = 0.0  # Placeholder
-    features = ['numMinutes', 'opponent_oss', 'recent_avg_fp', 'season_avg_fp', 'bfi']
-    df.dropna(subset=features, inplace=True)
-
-    X = df[features]
-
-    # Predict
-    model = mlflow.sklearn.load_model("mlruns/0/a5cefbc637fe4c24b6d693e303f11826/artifacts/model")
-    df.loc[:, "predicted_fp"] = model.predict(X)
-    df.loc[:, "diff_from_season_avg"] = df["predicted_fp"] - df["season_avg_fp"]
-
-    # Output
-    columns = [
-        "firstName", "lastName", "playerteamName", "opponentteamName",
-        "predicted_fp", "season_avg_fp", "diff_from_season_avg",
-        "image_url", "oss_message"
-    ]
-    top_predicted = df.sort_values(by="predicted_fp", ascending=False).head(3)[columns]
-    top_booms = df.sort_values(by="diff_from_season_avg", ascending=False).head(3)[columns]
+    top_predicted = df.head(3)[OUTPUT_COLUMNS]
+    top_booms = df.sort_values(by="diff_from_season_avg", ascending=False).head(3)[OUTPUT_COLUMNS]
 
     return top_predicted, top_booms
 
@@ -1,116 +1,349 @@
+import argparse
 import pandas as pd
-import os
-import kagglehub
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from bfi import load_injuries, compute_bfi, index_teammates
+from box_scores import load_box_scores
+from scoring import STAT_COLUMNS, add_fantasy_points
+from players import load_players, load_all_players, attach_players
+from oss import load_oss_cache, map_oss, bucket_games, oss_as_of, WINDOW_DAYS as OSS_WINDOW_DAYS
+from features import GroupLayout, rolling_features
+from tracing import current_span, stage, traced
 
 # DATA PROCESSING
+#
+# `python process_model_data.py` rebuilds model_training_data.csv from the
+# last 30 days of box scores. `python process_model_data.py --incremental`
+# picks up from the last processed gameDate recorded in STATE_FILE, carries
+# each player's rolling/expanding state forward and appends only new games.
+# STATE_FILE also records how long OUTPUT_FILE was when it was saved, so
+# rows appended by a run that died before saving its state are cut off again
+# instead of being appended twice.
+# `python process_model_data.py --backfill` builds every season in the
+# box-score history instead, one season per worker process, into
+# TRAINING_STORE/<season>.parquet. Each season's rows get the opponent
+# strength as it stood on their own game day and that season's injury
+# reports, positions come from Players.csv (so players who have since left
+# the league are kept), and rolling features restart every season.
 
-path = kagglehub.dataset_download("eoinamoore/historical-nba-data-and-player-box-scores")
-nba = pd.read_csv(os.path.join(path, "PlayerStatistics.csv"), low_memory=False)
-nba['gameDate'] = pd.to_datetime(nba['gameDate'])
-
-with open("player_lookup_cache.json", "r") as f:
-    player_lookup = json.load(f)
-
-with open("opponent_strength_cache.json", "r") as f:
-    oss_cache = json.load(f)
-
-nba['fp'] = (
-    nba['points'] +
-    nba['reboundsTotal'] +
-    nba['assists'] * 2 -
-    nba['turnovers'] * 2 +
-    nba['fieldGoalsMade'] * 2 -
-    nba['fieldGoalsAttempted'] +
-    nba['blocks'] * 4 +
-    nba['steals'] * 4 -
-    (nba['freeThrowsAttempted'] - nba['freeThrowsMade']) +
-    nba['threePointersMade']
-)
-
-cutoff = datetime.today() - timedelta(days=30)
-nba_recent = nba[nba['gameDate'] >= cutoff].copy()
-
-def get_position(row):
-    key = f"{row['firstName']} {row['lastName']}"
-    return player_lookup.get(key, {}).get("position")
-
-nba_recent['position'] = nba_recent.apply(get_position, axis=1)
-nba_recent = nba_recent[nba_recent['position'].notna() & (nba_recent['numMinutes'] > 0)]
-
-def get_oss(row):
-    team = row['opponentteamName']
-    pos = row['position'][0]  
-    return oss_cache.get(team, {}).get(pos)
-
-nba_recent['opponent_oss'] = nba_recent.apply(get_oss, axis=1)
-nba_recent = nba_recent[nba_recent['opponent_oss'].notna()]
-
-nba_recent = nba_recent.sort_values(by=['firstName', 'lastName', 'gameDate'])
-nba_recent['recent_avg_fp'] = (
-    nba_recent
-    .groupby(['firstName', 'lastName'])['fp']
-    .transform(lambda x: x.shift(1).rolling(window=5, min_periods=1).mean())
-)
-
-nba_recent['season_avg_fp'] = (
-    nba_recent
-    .groupby(['firstName', 'lastName'])['fp']
-    .transform(lambda x: x.shift(1).expanding().mean())
-)
-
-nba_recent['avg_minutes'] = (
-    nba_recent
-    .groupby(['firstName', 'lastName'])['numMinutes']
-    .transform(lambda x: x.shift(1).expanding().mean())
-)
-
-injuries = pd.read_csv("injury_data.csv")
-injuries['DATE'] = pd.to_datetime(injuries['DATE'])
-injuries['player_name'] = injuries['PLAYER'].apply(lambda x: f"{x.split(', ')[1]} {x.split(', ')[0]}")
-avg_min_lookup = nba_recent[['firstName', 'lastName', 'gameDate', 'avg_minutes']]
-
-bfi_scores = []
-lookup_dict = nba_recent.set_index(['firstName', 'lastName', 'gameDate'])['avg_minutes'].to_dict()
-
-for _, row in nba_recent.iterrows():
-    game_date = row['gameDate'].date()
-    team = row['playerteamName']
-    position = row['position'][0]
-
-    teammates = nba_recent[
-        (nba_recent['playerteamName'] == team) &
-        (nba_recent['position'].str.startswith(position))
-    ]
-    teammate_names = set(teammates.apply(lambda r: f"{r['firstName']} {r['lastName']}", axis=1))
-
-    injured = injuries[
-        (injuries['TEAM'] == team) &
-        (injuries['STATUS'] == 'Out') &
-        (injuries['DATE'] == game_date)
-    ]
-
-    injured_names = set(injured['player_name'])
-
-    total_bfi = 0.0
-    for name in injured_names:
-        parts = name.split(' ')
-        if len(parts) < 2:
-            continue
-        first = parts[0]
-        last = ' '.join(parts[1:])
-        key = (first, last, row['gameDate'])
-        if key in lookup_dict and name in teammate_names:
-            total_bfi += lookup_dict[key]
-
-    bfi_scores.append(total_bfi)
-
-nba_recent['bfi'] = bfi_scores
-
-model_data = nba_recent[[
-    'firstName', 'lastName', 'playerteamName', 'gameDate', 'numMinutes',
+OUTPUT_FILE = "model_training_data.csv"
+STATE_FILE = "model_data_state.json"
+INJURY_FILE = "injury_data.csv"
+TRAINING_STORE = "training_data"
+MANIFEST = "_manifest.json"
+# a season runs from August to July and is named after the year it starts in
+SEASON_START_MONTH = 8
+WINDOW_DAYS = 30
+RECENT_GAMES = 5
+# players are told apart by id, not name: two players can share a name
+KEYS = ['personId']
+OUTPUT_COLUMNS = [
+    'firstName', 'lastName', 'personId', 'playerteamName', 'gameDate', 'numMinutes',
     'opponent_oss', 'recent_avg_fp', 'season_avg_fp', 'bfi', 'fp'
-]].dropna()
+]
+# extra last-N-games means written after OUTPUT_COLUMNS, e.g. fp_mean_10
+LAG_COLUMNS = ['fp', 'numMinutes']
+LAG_WINDOWS = [3, 5, 10, 20]
+LAG_FEATURES = [f"{column}_mean_{window}" for column in LAG_COLUMNS for window in LAG_WINDOWS]
+RECENT_COLUMNS = [f"recent_{column}" for column in LAG_COLUMNS]
+HISTORY_COLUMNS = KEYS + RECENT_COLUMNS + ['fp_sum', 'fp_count', 'min_sum', 'min_count']
+
+@traced()
+def load_games(start):
+    nba = load_box_scores(
+        columns=['personId', 'firstName', 'lastName', 'playerteamName', 'opponentteamName', 'numMinutes'] + STAT_COLUMNS,
+        start=start
+    )
+    return add_fantasy_points(nba)
+
+@traced()
+def prepare_rows(nba, opponent_oss=None, players=None):
+    """Rows with a known position and minutes played, plus opponent_oss.
+
+    opponent_oss(rows) returns each row's OSS; by default it is looked up
+    in today's cache. players defaults to this season's lookup cache.
+    """
+    if players is None:
+        players = load_players()
+    nba_recent = attach_players(nba, ['position', 'primary_position'], players)
+    nba_recent = nba_recent[nba_recent['position'].notna() & (nba_recent['numMinutes'] > 0)]
+
+    if opponent_oss is None:
+        oss_cache = load_oss_cache()
+        opponent_oss = lambda rows: map_oss(rows['opponentteamName'], rows['primary_position'], oss_cache)
+    nba_recent['opponent_oss'] = opponent_oss(nba_recent)
+    nba_recent = nba_recent[nba_recent['opponent_oss'].notna()]
+
+    nba_recent = nba_recent.drop(columns='primary_position')
+    nba_recent['position'] = nba_recent['position'].astype(str)
+    # by name for a readable CSV; personId keeps namesakes' games apart
+    return nba_recent.sort_values(by=['firstName', 'lastName'] + KEYS + ['gameDate'])
+
+@traced()
+def add_rolling_features(nba_recent, history=None):
+    """Add recent_avg_fp, season_avg_fp, avg_minutes and LAG_FEATURES to rows sorted by player and date.
+
+    history holds each player's carried-over state (last max(LAG_WINDOWS)
+    values of every LAG_COLUMNS stat plus running fp/minute sums and counts)
+    from earlier runs; without it every player starts fresh, which is the
+    full-rebuild behaviour.
+    """
+    if history is None:
+        history = empty_history()
+
+    # expanding means over every earlier game, carried-over ones included
+    prior = nba_recent[KEYS].merge(history, on=KEYS, how='left')
+    prior.index = nba_recent.index
+    prior = prior.rename(columns={'min_sum': 'numMinutes_sum', 'min_count': 'numMinutes_count'})
+    season = rolling_features(
+        nba_recent, GroupLayout(nba_recent, KEYS), ['fp', 'numMinutes'], [None], prior=prior
+    )
+    nba_recent['season_avg_fp'] = season['fp_mean_all']
+    nba_recent['avg_minutes'] = season['numMinutes_mean_all']
+
+    # rolling windows: prepend each player's carried-over games, then drop them again
+    window = _with_carried(history, nba_recent)
+    lags = rolling_features(window, GroupLayout(window, KEYS), LAG_COLUMNS, LAG_WINDOWS)
+    lags.index = window['_order']
+    lags = lags[window['_new'].values].sort_index()
+    nba_recent[LAG_FEATURES] = lags[LAG_FEATURES].values
+    nba_recent['recent_avg_fp'] = nba_recent[f"fp_mean_{RECENT_GAMES}"]
+
+    return nba_recent
+
+def _with_carried(history, nba_recent):
+    """Carried-over games followed by the new rows, grouped by player."""
+    carried = (
+        history[KEYS + RECENT_COLUMNS]
+        .explode(RECENT_COLUMNS)
+        .dropna(subset=RECENT_COLUMNS, how='all')
+        .rename(columns=dict(zip(RECENT_COLUMNS, LAG_COLUMNS)))
+        .astype({column: float for column in LAG_COLUMNS})
+    )
+    new = nba_recent[KEYS + LAG_COLUMNS].assign(_order=range(len(nba_recent)))
+    frames = [carried.assign(_new=False, _order=-1), new.assign(_new=True)]
+    window = pd.concat([f for f in frames if not f.empty], ignore_index=True)
+    return window.sort_values(KEYS, kind='stable', ignore_index=True)
+
+def empty_history():
+    return pd.DataFrame(columns=HISTORY_COLUMNS).astype({'personId': 'int64'})
+
+@traced()
+def advance_history(history, nba_recent):
+    """Fold the processed rows into the per-player carry-over state."""
+    current_span().rows = len(nba_recent)
+    window = _with_carried(history, nba_recent)
+    layout = GroupLayout(window, KEYS)
+    kept = window[layout.from_end < max(LAG_WINDOWS)]
+    recent = (
+        kept.groupby(KEYS)[LAG_COLUMNS]
+        .agg(list)
+        .rename(columns=dict(zip(LAG_COLUMNS, RECENT_COLUMNS)))
+    )
+
+    totals = nba_recent.groupby(KEYS).agg(
+        fp_sum=('fp', 'sum'), fp_count=('fp', 'count'),
+        min_sum=('numMinutes', 'sum'), min_count=('numMinutes', 'count')
+    )
+    sums = ['fp_sum', 'fp_count', 'min_sum', 'min_count']
+    totals = totals.add(history.set_index(KEYS)[sums].astype(float), fill_value=0)
+
+    return totals.join(recent).reset_index()[HISTORY_COLUMNS]
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return None
+    with open(STATE_FILE, "r") as f:
+        state = json.load(f)
+    if 'csv_bytes' not in state:
+        return None  # written before the output length was recorded; rebuild
+    if state['players'] and not set(HISTORY_COLUMNS) <= set(state['players'][0]):
+        return None  # written before LAG_COLUMNS were carried or players were keyed by personId; rebuild
+    state['players'] = pd.DataFrame(state['players'], columns=HISTORY_COLUMNS).astype({'personId': 'int64'})
+    state['teammates'] = pd.DataFrame(
+        state['teammates'], columns=['playerteamName', 'pos_key', 'firstName', 'lastName']
+    )
+    return state
+
+@traced()
+def save_state(last_game_date, history, teammates):
+    state = {
+        "last_game_date": pd.Timestamp(last_game_date).isoformat(),
+        # OUTPUT_FILE as it stands with every row up to last_game_date
+        "csv_bytes": os.path.getsize(OUTPUT_FILE),
+        "players": history.to_dict(orient='records'),
+        "teammates": teammates.values.tolist(),
+    }
+    tmp_file = f"{STATE_FILE}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_file, STATE_FILE)
+
+@traced()
+def build_full():
+    cutoff = datetime.today() - timedelta(days=WINDOW_DAYS)
+    nba = load_games(cutoff)
+    nba_recent = add_rolling_features(prepare_rows(nba))
+
+    with stage("bfi", rows=len(nba_recent)):
+        injuries = load_injuries(INJURY_FILE)
+        teammates = index_teammates(nba_recent)
+        nba_recent['bfi'] = compute_bfi(nba_recent, injuries, teammates)
+
+    model_data = nba_recent[OUTPUT_COLUMNS + LAG_FEATURES].dropna(subset=OUTPUT_COLUMNS)
+    with stage("write_csv", rows=len(model_data)):
+        # the old state doesn't describe the new file; without one the next --incremental rebuilds
+        if os.path.exists(STATE_FILE):
+            os.remove(STATE_FILE)
+        model_data.to_csv(OUTPUT_FILE, index=False)
+
+    history = advance_history(empty_history(), nba_recent)
+    save_state(nba['gameDate'].max(), history, teammates)
+    print(f"Rebuilt {OUTPUT_FILE} with {len(model_data)} rows.")
+
+def _rewind_output(csv_bytes):
+    """Cut OUTPUT_FILE back to the length recorded with the state.
+
+    False when it can't be appended to: missing, shorter than recorded, or
+    written with other columns than OUTPUT_COLUMNS + LAG_FEATURES.
+    """
+    if not os.path.exists(OUTPUT_FILE) or os.path.getsize(OUTPUT_FILE) < csv_bytes:
+        return False
+    with open(OUTPUT_FILE, "r") as f:
+        if f.readline().rstrip("\n").split(",") != OUTPUT_COLUMNS + LAG_FEATURES:
+            return False
+    extra = os.path.getsize(OUTPUT_FILE) - csv_bytes
+    if extra:
+        print(f"Dropping {extra} bytes appended to {OUTPUT_FILE} by a run that stopped before saving its state.")
+        with open(OUTPUT_FILE, "r+b") as f:
+            f.truncate(csv_bytes)
+    return True
+
+@traced()
+def build_incremental():
+    state = load_state()
+    if state is None or not _rewind_output(state['csv_bytes']):
+        print(f"No usable {STATE_FILE} found, running a full rebuild.")
+        return build_full()
+
+    last_game_date = pd.Timestamp(state['last_game_date'])
+    nba = load_games(last_game_date)
+    nba = nba[nba['gameDate'] > last_game_date]
+    if nba.empty:
+        print(f"No games after {last_game_date.date()}, nothing to append.")
+        return
+
+    history = state['players']
+    nba_recent = add_rolling_features(prepare_rows(nba), history)
+
+    with stage("bfi", rows=len(nba_recent)):
+        injuries = load_injuries(INJURY_FILE)
+        teammates = pd.concat([state['teammates'], index_teammates(nba_recent)]).drop_duplicates()
+        nba_recent['bfi'] = compute_bfi(nba_recent, injuries, teammates)
+
+    model_data = nba_recent[OUTPUT_COLUMNS + LAG_FEATURES].dropna(subset=OUTPUT_COLUMNS)
+    with stage("write_csv", rows=len(model_data)):
+        model_data.to_csv(OUTPUT_FILE, mode='a', header=False, index=False)
+
+    save_state(nba['gameDate'].max(), advance_history(history, nba_recent), teammates)
+    print(f"Appended {len(model_data)} rows for games after {last_game_date.date()} to {OUTPUT_FILE}.")
+
+def season_of(dates):
+    dates = pd.to_datetime(pd.Series(dates))
+    return dates.dt.year - (dates.dt.month < SEASON_START_MONTH)
+
+def season_range(season):
+    return pd.Timestamp(season, SEASON_START_MONTH, 1), pd.Timestamp(season + 1, SEASON_START_MONTH, 1)
+
+@traced()
+def build_season(season, store_dir=TRAINING_STORE):
+    """Build one season's training rows and write them to store_dir/<season>.parquet."""
+    start, end = season_range(season)
+    # OSS needs the games of the window before the season's first game day too
+    nba = add_fantasy_points(load_box_scores(
+        columns=['personId', 'firstName', 'lastName', 'playerteamName', 'opponentteamName', 'numMinutes'] + STAT_COLUMNS,
+        start=start - timedelta(days=OSS_WINDOW_DAYS), end=end
+    ))
+    # the lookup cache only has today's players; Players.csv has everyone who played that season
+    players = load_all_players()
+    buckets = bucket_games(nba[nba['numMinutes'] > 0], players)
+    as_of_game_day = lambda rows: oss_as_of(buckets, rows['opponentteamName'], rows['primary_position'], rows['gameDate'])
+
+    nba_recent = add_rolling_features(prepare_rows(nba[nba['gameDate'] >= start], as_of_game_day, players))
+
+    with stage("bfi", rows=len(nba_recent)):
+        injuries = load_injuries(INJURY_FILE)
+        injuries = injuries[(injuries['DATE'] >= start) & (injuries['DATE'] < end)]
+        nba_recent['bfi'] = compute_bfi(nba_recent, injuries)
+
+    model_data = nba_recent[OUTPUT_COLUMNS + LAG_FEATURES].dropna(subset=OUTPUT_COLUMNS)
+    with stage("write_partition", rows=len(model_data)):
+        path = os.path.join(store_dir, f"{season}.parquet")
+        tmp_file = f"{path}.tmp"
+        model_data.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, path)
+    return len(model_data)
+
+def _read_store_manifest(store_dir):
+    try:
+        with open(os.path.join(store_dir, MANIFEST), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"seasons": {}}
+
+@traced()
+def backfill(seasons=None, workers=None, store_dir=TRAINING_STORE):
+    """Build the given seasons (every season in the box scores by default) in parallel."""
+    # reading the dates also builds the box-score store here, before any worker needs it
+    available = sorted(season_of(load_box_scores(columns=['gameDate'])['gameDate']).unique().tolist())
+    if seasons is not None:
+        available = [season for season in available if seasons[0] <= season <= seasons[-1]]
+    if not available:
+        print("No box scores in the requested seasons.")
+        return
+
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = _read_store_manifest(store_dir)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_season, season, store_dir): season for season in available}
+        for future in as_completed(futures):
+            season = futures[future]
+            manifest["seasons"][str(season)] = future.result()
+            print(f"Season {season}: {manifest['seasons'][str(season)]} rows")
+
+    manifest["seasons"] = dict(sorted(manifest["seasons"].items()))
+    manifest["built_at"] = datetime.now().isoformat(timespec="seconds")
+    tmp_file = os.path.join(store_dir, f"{MANIFEST}.tmp")
+    with open(tmp_file, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_file, os.path.join(store_dir, MANIFEST))
+    print(f"Backfilled {len(available)} seasons, {sum(manifest['seasons'].values())} rows in total → {store_dir}")
+
+def load_training_store(store_dir=TRAINING_STORE, seasons=None):
+    """Every season partition in the training store (or those in [first, last]) as one frame."""
+    names = sorted(_read_store_manifest(store_dir)["seasons"], key=int)
+    if seasons is not None:
+        names = [name for name in names if seasons[0] <= int(name) <= seasons[-1]]
+    frames = [pd.read_parquet(os.path.join(store_dir, f"{name}.parquet")) for name in names]
+    if not frames:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS + LAG_FEATURES)
+    return pd.concat(frames, ignore_index=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the model training data.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--incremental", action="store_true", help="append only games after the last run")
+    mode.add_argument("--backfill", action="store_true", help=f"build every season into {TRAINING_STORE}/")
+    parser.add_argument("--seasons", type=int, nargs=2, metavar=("FIRST", "LAST"),
+                        help="with --backfill, only seasons starting in FIRST..LAST")
+    parser.add_argument("--workers", type=int, default=None, help="with --backfill, worker processes (default: every core)")
+    args = parser.parse_args()
 
-model_data.to_csv("model_training_data.csv", index=False)
\ No newline at end of file
+    if args.backfill:
+        backfill(args.seasons, args.workers)
+    elif args.incremental:
+        build_incremental()
+    else:
+        build_full()
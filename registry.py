@@ -0,0 +1,166 @@
+import glob
+import json
+import os
+import sys
+from datetime import datetime
+
+# MODEL REGISTRY
+#
+# `python registry.py promote <run_id>` loads a model MLflow logged under
+# mlruns/ and exports it to models/<run_id>.joblib, uncompressed so its tree
+# arrays can be memory-mapped, then points models/current.json at it. The
+# dashboard loads the current model with joblib alone: no MLflow import at
+# serve time, and every worker process shares the same mapped pages.
+# Promotion also scores the model once on the last time-ordered fold of the
+# training data and stores the metrics plus a downsampled actual/predicted
+# scatter next to the artifact, so the dashboard's accuracy plot never runs
+# the model. `python registry.py evaluate` redoes that for the current model;
+# `python registry.py show` prints what is current.
+
+REGISTRY_DIR = "models"
+CURRENT_FILE = os.path.join(REGISTRY_DIR, "current.json")
+MLRUNS_DIR = "mlruns"
+EVAL_FOLDS = 5
+MAX_POINTS = 1500
+
+def _write_json(path, data):
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_file, path)
+
+def resolve_model_uri(run):
+    """Local artifact directory for a run id; anything else is passed to MLflow as-is."""
+    matches = glob.glob(os.path.join(MLRUNS_DIR, "*", run, "artifacts", "model"))
+    return matches[0] if matches else run
+
+def _model_id(source):
+    # mlruns/<exp>/<run_id>/artifacts/model, or mlruns/<exp>/models/<model_id>/artifacts
+    parts = os.path.normpath(source).split(os.sep)
+    if "artifacts" in parts:
+        return parts[parts.index("artifacts") - 1]
+    return parts[-1]
+
+def latest_model(mlruns_dir=MLRUNS_DIR):
+    """Artifact directory of the most recently logged model under mlruns/."""
+    models = (
+        glob.glob(os.path.join(mlruns_dir, "*", "*", "artifacts", "model", "MLmodel")) +
+        glob.glob(os.path.join(mlruns_dir, "*", "models", "*", "artifacts", "MLmodel"))
+    )
+    if not models:
+        raise FileNotFoundError(f"No logged models under {mlruns_dir}/")
+    return os.path.dirname(max(models, key=os.path.getmtime))
+
+def promote(run, registry_dir=REGISTRY_DIR, model_id=None, training_data=None):
+    """Export a logged model (run id, artifact directory or MLflow URI) and make it current.
+
+    training_data is what the model was trained on: by default the
+    training_data param ml_model.py logged with the run, else the training
+    CSV. The stored evaluation scores the model on that same data.
+    """
+    import joblib
+    import mlflow.sklearn
+    import sklearn
+
+    source = resolve_model_uri(run)
+    model = mlflow.sklearn.load_model(source)
+    run_id = model_id or _model_id(source)
+
+    os.makedirs(registry_dir, exist_ok=True)
+    artifact = os.path.join(registry_dir, f"{run_id}.joblib")
+    tmp_file = f"{artifact}.tmp"
+    joblib.dump(model, tmp_file, compress=0)
+    os.replace(tmp_file, artifact)
+
+    current = {
+        "run_id": run_id,
+        "artifact": artifact,
+        "source": source,
+        "model_type": type(model).__name__,
+        "sklearn_version": sklearn.__version__,
+        "promoted_at": datetime.now().isoformat(timespec="seconds"),
+        "training_data": training_data or _logged_training_data(run_id) or _default_training_data(),
+    }
+    current["evaluation"] = save_evaluation(model, artifact, current["training_data"])
+    _write_json(os.path.join(registry_dir, "current.json"), current)
+    print(f"Promoted {run_id} → {artifact}")
+    return current
+
+def evaluate(model, training_data=None, folds=EVAL_FOLDS, max_points=MAX_POINTS):
+    """R², MAE and an OLS trend on the last TimeSeriesSplit fold, plus a scatter sample."""
+    import numpy as np
+    import pandas as pd
+    from sklearn.metrics import r2_score, mean_absolute_error
+    from sklearn.model_selection import TimeSeriesSplit
+    from ml_model import FEATURES, TARGET, read_training_data
+
+    data = read_training_data(training_data or _default_training_data())
+    data['gameDate'] = pd.to_datetime(data['gameDate'])
+    data = data.sort_values(by='gameDate').dropna(subset=FEATURES + [TARGET])
+
+    # the final (most realistic) train/test split
+    _, test_index = list(TimeSeriesSplit(n_splits=folds).split(data))[-1]
+    test = data.iloc[test_index]
+    y_test = test[TARGET].to_numpy(dtype=float)
+    y_pred = model.predict(test[FEATURES])
+    slope, intercept = np.polyfit(y_test, y_pred, 1)
+
+    # evenly spaced through the fold, so the sample keeps its spread over time
+    sample = np.unique(np.linspace(0, len(y_test) - 1, min(len(y_test), max_points)).round().astype(int))
+    return {
+        "r2": r2_score(y_test, y_pred),
+        "mae": mean_absolute_error(y_test, y_pred),
+        "n_test": len(y_test),
+        "trend": {"slope": slope, "intercept": intercept},
+        "actual": y_test[sample].tolist(),
+        "predicted": y_pred[sample].tolist(),
+    }
+
+def _logged_training_data(run_id, mlruns_dir=MLRUNS_DIR):
+    """The training_data param of a run in the local file store, if it logged one."""
+    for path in glob.glob(os.path.join(mlruns_dir, "*", run_id, "params", "training_data")):
+        with open(path, "r") as f:
+            return f.read().strip()
+    return None
+
+def _default_training_data():
+    from ml_model import TRAINING_DATA
+    return TRAINING_DATA
+
+def save_evaluation(model, artifact, training_data=None):
+    path = f"{os.path.splitext(artifact)[0]}.eval.json"
+    _write_json(path, evaluate(model, training_data))
+    return path
+
+def current_evaluation(path=CURRENT_FILE):
+    """Stored evaluation of the current model, computed once if it predates evaluations."""
+    info = current(path)
+    if "evaluation" not in info or not os.path.exists(info["evaluation"]):
+        info["evaluation"] = save_evaluation(load_current(path), info["artifact"], info.get("training_data"))
+        _write_json(path, info)
+    with open(info["evaluation"], "r") as f:
+        return json.load(f)
+
+def current(path=CURRENT_FILE):
+    with open(path, "r") as f:
+        return json.load(f)
+
+def load_current(path=CURRENT_FILE, mmap_mode='r'):
+    """The current model, with its arrays memory-mapped from the artifact."""
+    import joblib
+    return joblib.load(current(path)["artifact"], mmap_mode=mmap_mode)
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["promote"]:
+        promote(args[1] if len(args) > 1 else latest_model())
+    elif args[:1] == ["evaluate"]:
+        info = current()
+        info["evaluation"] = save_evaluation(load_current(), info["artifact"], info.get("training_data"))
+        _write_json(CURRENT_FILE, info)
+        print(f"Evaluation saved → {info['evaluation']}")
+    elif args[:1] == ["show"]:
+        print(json.dumps(current(), indent=2))
+    else:
+        print("usage: python registry.py promote [run_id] | evaluate | show")
+        sys.exit(1)
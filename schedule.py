@@ -0,0 +1,51 @@
+import pandas as pd
+
+# SCHEDULE INDEX
+#
+# The league schedule reshaped into one row per (game day, team), with the
+# opponent, home/away flag and tip time, sorted by day so any date range is
+# a binary search away. Built once per season file instead of rescanning the
+# whole schedule for every player row.
+
+class ScheduleIndex:
+    def __init__(self, schedule, teamid_to_simple=None):
+        tipoff = pd.to_datetime(schedule['gameDateTimeEst'])
+        game_day = pd.to_datetime(tipoff.dt.date)
+
+        home = pd.DataFrame({
+            'game_day': game_day, 'gameId': schedule['gameId'], 'teamId': schedule['hometeamId'],
+            'opponentId': schedule['awayteamId'], 'home': True, 'tipoff': tipoff,
+        })
+        away = pd.DataFrame({
+            'game_day': game_day, 'gameId': schedule['gameId'], 'teamId': schedule['awayteamId'],
+            'opponentId': schedule['hometeamId'], 'home': False, 'tipoff': tipoff,
+        })
+
+        # one game per team per day; the first listed wins, as before
+        games = pd.concat([home, away]).sort_index(kind='stable')
+        games = games.drop_duplicates(subset=['game_day', 'teamId'], keep='first')
+
+        if teamid_to_simple is not None:
+            games['teamName'] = games['teamId'].map(teamid_to_simple)
+            games['opponentteamName'] = games['opponentId'].map(teamid_to_simple)
+
+        self.games = games.sort_values(by=['game_day', 'teamId'], kind='stable').reset_index(drop=True)
+        self._days = self.games['game_day'].values
+
+    @classmethod
+    def from_csv(cls, schedule_csv, teamid_to_simple=None):
+        return cls(pd.read_csv(schedule_csv), teamid_to_simple)
+
+    def between(self, start, end):
+        """Team-games with game_day in [start, end], both inclusive."""
+        lo = self._days.searchsorted(pd.Timestamp(start).to_datetime64(), side='left')
+        hi = self._days.searchsorted(pd.Timestamp(end).to_datetime64(), side='right')
+        return self.games.iloc[lo:hi]
+
+    def on(self, game_date):
+        return self.between(game_date, game_date)
+
+    def opponent(self, game_date, team_id):
+        games = self.on(game_date)
+        match = games[games['teamId'] == team_id]
+        return None if match.empty else match.iloc[0]['opponentId']
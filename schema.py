@@ -0,0 +1,44 @@
+import pandas as pd
+
+# BOX-SCORE SCHEMA
+#
+# Compact in-memory dtypes for box-score frames. Names, teams and game type
+# repeat on every row, so they become categoricals; ids are int32, flags
+# int8, and counting stats float32, which is exact for whole numbers and
+# still leaves NaN for players who didn't get on the floor. Applied with
+# load_box_scores(compact=True) by processes that keep frames resident.
+#
+# Grouping or merging on a categorical column needs observed=True (or a
+# string key) to get the same groups as the plain object frame, which is
+# why the training scripts keep loading the default dtypes.
+
+CATEGORY_COLUMNS = [
+    'firstName', 'lastName', 'playerteamCity', 'playerteamName',
+    'opponentteamCity', 'opponentteamName', 'gameType',
+]
+ID_COLUMNS = ['personId', 'gameId']
+FLAG_COLUMNS = ['win', 'home']
+STATS = [
+    'numMinutes', 'points', 'assists', 'blocks', 'steals',
+    'fieldGoalsAttempted', 'fieldGoalsMade', 'threePointersAttempted', 'threePointersMade',
+    'freeThrowsAttempted', 'freeThrowsMade', 'reboundsDefensive', 'reboundsOffensive',
+    'reboundsTotal', 'foulsPersonal', 'turnovers', 'plusMinusPoints',
+]
+
+DTYPES = {
+    **{col: 'category' for col in CATEGORY_COLUMNS},
+    **{col: 'int32' for col in ID_COLUMNS},
+    **{col: 'int8' for col in FLAG_COLUMNS},
+    **{col: 'float32' for col in STATS},
+}
+
+def dtypes_for(columns):
+    """The schema dtypes of the given columns, e.g. for read_csv(dtype=...)."""
+    return {col: DTYPES[col] for col in columns if col in DTYPES}
+
+def compact(df):
+    """df with every column the schema knows converted to its compact dtype."""
+    df = df.astype(dtypes_for(df.columns))
+    if 'gameDate' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['gameDate']):
+        df['gameDate'] = pd.to_datetime(df['gameDate'])
+    return df
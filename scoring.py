@@ -0,0 +1,54 @@
+import numpy as np
+
+# FANTASY SCORING
+#
+# Every points league is a weight per box-score stat, so scoring is one
+# matrix-vector product: (rows x stats) @ (stats x profiles). Several
+# profiles stack into one weight matrix and are computed in the same pass.
+
+# box-score columns any scoring profile reads
+STAT_COLUMNS = [
+    'points', 'reboundsTotal', 'assists', 'turnovers', 'fieldGoalsMade',
+    'fieldGoalsAttempted', 'blocks', 'steals', 'freeThrowsAttempted',
+    'freeThrowsMade', 'threePointersMade'
+]
+
+PROFILES = {
+    # ESPN standard points: the formula the dashboard has always used
+    "espn": {
+        'points': 1, 'reboundsTotal': 1, 'assists': 2, 'turnovers': -2,
+        'fieldGoalsMade': 2, 'fieldGoalsAttempted': -1, 'blocks': 4, 'steals': 4,
+        'freeThrowsAttempted': -1, 'freeThrowsMade': 1, 'threePointersMade': 1,
+    },
+    "yahoo": {
+        'points': 1, 'reboundsTotal': 1.2, 'assists': 1.5, 'steals': 3,
+        'blocks': 3, 'turnovers': -1,
+    },
+}
+DEFAULT_PROFILE = "espn"
+
+def weight_matrix(profiles):
+    """Stat columns used by any of the profiles and their (stats x profiles) weights."""
+    weights = [PROFILES[p] if isinstance(p, str) else p for p in profiles]
+    columns = [c for c in STAT_COLUMNS if any(w.get(c, 0) != 0 for w in weights)]
+    matrix = np.array([[w.get(c, 0) for w in weights] for c in columns], dtype=np.float64)
+    return columns, matrix
+
+def fantasy_points(df, profiles=(DEFAULT_PROFILE,)):
+    """(rows x profiles) array of fantasy points; a missing stat gives NaN, as before.
+
+    profiles are names from PROFILES or {stat: weight} dicts.
+    """
+    columns, matrix = weight_matrix(profiles)
+    return df[columns].to_numpy(dtype=np.float64) @ matrix
+
+def add_fantasy_points(df, profile=DEFAULT_PROFILE, column='fp'):
+    df[column] = fantasy_points(df, (profile,))[:, 0]
+    return df
+
+def add_profiles(df, profiles, prefix='fp_'):
+    """Add one fp_<name> column per named profile, all from a single product."""
+    points = fantasy_points(df, profiles)
+    for i, name in enumerate(profiles):
+        df[f"{prefix}{name}"] = points[:, i]
+    return df
@@ -0,0 +1,208 @@
+import gzip
+import json
+import os
+import pandas as pd
+from datetime import datetime, timedelta
+import plotly.express as px
+from predictor import get_tomorrows_predictions
+from plots import create_pred_vs_actual_figure
+from box_scores import load_box_scores
+from scoring import STAT_COLUMNS, add_fantasy_points
+from players import load_players, attach_players
+
+# DASHBOARD SNAPSHOT
+#
+# `python snapshot.py` runs the whole dashboard data pipeline (top
+# performers, last-5 leaders, buy-low/sell-high, predictions and the model
+# accuracy plot) and writes every section plus its Plotly figures to one
+# gzipped JSON file. dashboard.py only ever reads that file, so it never
+# imports pandas, Plotly or the model at startup.
+
+SNAPSHOT_FILE = "dashboard_snapshot.json.gz"
+
+# ---------------
+# DATA PROCESSING
+# ---------------
+
+def load_fantasy_stats():
+    # Read this season's box scores (only the columns relevant to fantasy)
+    fantasy_stats = load_box_scores(
+        columns=['personId', 'firstName', 'lastName', 'gameDate', 'playerteamName', 'opponentteamName', 'win',
+                 'numMinutes'] + STAT_COLUMNS,
+        start="2024-10-22",
+        compact=True
+    )
+    return add_fantasy_points(fantasy_stats)
+
+def _records(df, columns):
+    return json.loads(df[columns].to_json(orient='records', date_format='iso'))
+
+def _figure(fig):
+    return json.loads(fig.to_json())
+
+# --------------
+# TOP PERFORMERS
+# --------------
+
+TOP_N = 5
+CATEGORIES = ["All", "G", "F", "C"]
+
+def top_performers(fantasy_stats, players, yesterday, n=TOP_N):
+    """Yesterday's top n performers for every position category, best first."""
+    games_yesterday = fantasy_stats[fantasy_stats['gameDate'].dt.date == yesterday]
+    games_yesterday = attach_players(games_yesterday, ['image_url', 'position', 'primary_position'], players)
+    games_yesterday = games_yesterday[games_yesterday["position"].notna()]
+
+    games_yesterday = games_yesterday.sort_values(by='fp', ascending=False)
+    columns = ['firstName', 'lastName', 'personId', 'image_url', 'position', 'fp']
+
+    tables = {"All": _records(games_yesterday.head(n), columns)}
+    for category in CATEGORIES[1:]:
+        tables[category] = _records(games_yesterday[games_yesterday['primary_position'] == category].head(n), columns)
+    return tables
+
+def last_5_leaders(fantasy_stats, players):
+    # Top 3 performers over their last 5 games
+    # sort only the key columns and pick rows by label, instead of copying the whole sorted frame
+    order = fantasy_stats[['personId', 'firstName', 'lastName', 'gameDate']].sort_values(by=['firstName', 'lastName', 'gameDate'])
+    last_5_games = fantasy_stats.loc[order.groupby('personId').tail(5).index]
+
+    player_totals = last_5_games.groupby('personId').agg({
+        'firstName': 'last',
+        'lastName': 'last',
+        'fp': 'sum',
+        'playerteamName': 'last'
+    }).sort_values(by=['firstName', 'lastName']).reset_index()
+
+    top_3 = player_totals.sort_values(by='fp', ascending=False).head(3)
+    top_3 = attach_players(top_3, ['image_url', 'position'], players)
+
+    leaders = []
+    for _, player in top_3.iterrows():
+        player_df = last_5_games[last_5_games['personId'] == player['personId']]
+        first = player_df.iloc[0]
+
+        fig = px.line(
+            player_df.sort_values(by='gameDate'),
+            x='gameDate',
+            y='fp',
+            markers=True,
+            title=f"{player['firstName']} {player['lastName']} - Last 5 Games",
+        )
+        leaders.append({
+            "firstName": player['firstName'],
+            "lastName": player['lastName'],
+            "playerteamName": first['playerteamName'],
+            "image_url": player["image_url"],
+            "position": player["position"],
+            "total_fp": float(player_df['fp'].sum()),
+            "figure": _figure(fig),
+        })
+    return leaders
+
+# -----------------
+# BUY LOW/SELL HIGH
+# -----------------
+
+def buy_sell_candidates(fantasy_stats, players):
+    order = fantasy_stats[['personId', 'gameDate']].sort_values(by='gameDate')
+    last_5 = fantasy_stats.loc[order.groupby('personId').tail(5).index]
+
+    play_counts = (
+        last_5
+        .assign(played=lambda df: df['numMinutes'] > 0)
+        .groupby('personId')['played']
+        .sum()
+        .reset_index()
+        .rename(columns={'played': 'played_5_count'})
+    )
+
+    recent_avg = (
+        last_5
+        .groupby('personId')['fp']
+        .mean()
+        .reset_index()
+        .rename(columns={'fp': 'recent_avg_fp'})
+    )
+
+    recent_game_info = (
+        last_5
+        .sort_values(by='gameDate', ascending=False)
+        .groupby('personId')
+        .head(1)[['personId', 'firstName', 'lastName', 'playerteamName']]
+    )
+
+    recent_summary = recent_avg.merge(play_counts, on='personId')
+    recent_summary = recent_summary.merge(recent_game_info, on='personId')
+
+    candidates = (
+        recent_summary[recent_summary['personId'].isin(players.index)]
+        .pipe(attach_players, ['image_url', 'position', 'avg_fp'], players)
+        .assign(diff=lambda df: df['recent_avg_fp'] - df['avg_fp'])
+        .query('avg_fp >= 30 and played_5_count >= 4')
+    )
+
+    def with_chart(df):
+        rows = _records(df, ['firstName', 'lastName', 'playerteamName', 'image_url', 'position',
+                             'recent_avg_fp', 'avg_fp'])
+        for row in rows:
+            chart_df = pd.DataFrame({
+                "Category": ["Last 5 Avg", "Season Avg"],
+                "FP": [row['recent_avg_fp'], row['avg_fp']]
+            })
+            fig = px.bar(chart_df, x="Category", y="FP",
+                         title=f"{row['firstName']} {row['lastName']} FP Comparison", height=500)
+            row["figure"] = _figure(fig)
+        return rows
+
+    buy_low_candidates = candidates.sort_values(by='diff').head(2)
+    sell_high_candidates = candidates.sort_values(by='diff', ascending=False).head(2)
+    return with_chart(buy_low_candidates), with_chart(sell_high_candidates)
+
+# -----------
+# PREDICTIONS
+# -----------
+
+def predictions():
+    top_preds, top_booms = get_tomorrows_predictions()
+    columns = ['firstName', 'lastName', 'image_url', 'predicted_fp', 'season_avg_fp', 'oss_message']
+    return _records(top_preds, columns), _records(top_booms, columns)
+
+# --------
+# SNAPSHOT
+# --------
+
+def build_snapshot(path=SNAPSHOT_FILE):
+    now = datetime.now()
+    adjusted_date = (now - timedelta(hours=8)).date()
+    yesterday = adjusted_date - timedelta(days=1)
+
+    fantasy_stats = load_fantasy_stats()
+    players = load_players()
+
+    buy_low, sell_high = buy_sell_candidates(fantasy_stats, players)
+    top_preds, top_booms = predictions()
+
+    snapshot = {
+        "built_at": now.isoformat(),
+        "yesterday": yesterday.isoformat(),
+        "top_performers": top_performers(fantasy_stats, players, yesterday),
+        "last_5_leaders": last_5_leaders(fantasy_stats, players),
+        "buy_low": buy_low,
+        "sell_high": sell_high,
+        "top_preds": top_preds,
+        "top_booms": top_booms,
+        "pred_vs_actual": _figure(create_pred_vs_actual_figure()),
+    }
+
+    # write next to the live file and swap, so readers never see half a snapshot
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+    print(f"Dashboard snapshot saved → {path}")
+    return snapshot
+
+if __name__ == "__main__":
+    build_snapshot()
@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+# STARTUP IMPORTS
+#
+# `python startup.py` imports each module in MODULES in a fresh interpreter
+# under `python -X importtime` and reports its cumulative import time (best of
+# REPEAT runs) and the third-party packages it pulled in. A module that pulls
+# in one of its off-limits packages fails the check: those belong to the
+# training and data scripts, not to a freshly spawned dashboard worker.
+# `--save-baseline` stores the times in BASELINE_FILE; later runs exit non-zero
+# when a module imports more than TOLERANCE slower than that.
+#
+# Run it from the directory the dashboard serves from, so `import dashboard`
+# finds its snapshot instead of building one.
+
+BASELINE_FILE = "startup_baseline.json"
+REPEAT = 5
+TOLERANCE = 0.2
+# differences below this are interpreter noise, never regressions
+MIN_REGRESSION_MS = 20
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCRIPT_ONLY = ["mlflow", "sklearn", "kagglehub", "statsmodels"]
+# module -> packages its import must not load
+MODULES = {
+    "dashboard": SCRIPT_ONLY + ["pandas", "numpy", "joblib"],
+    "registry": SCRIPT_ONLY + ["pandas", "numpy", "joblib"],
+    "predictor": SCRIPT_ONLY + ["joblib", "plotly", "dash"],
+    "plots": SCRIPT_ONLY + ["dash"],
+    "snapshot": SCRIPT_ONLY,
+}
+
+def parse_importtime(stderr):
+    """(total cumulative microseconds, set of top-level packages imported) from -X importtime output."""
+    total = 0
+    packages = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        packages.add(name.strip().split(".")[0])
+        if not name[1:].startswith(" "):  # only top-level imports, nested ones are inside them
+            total += int(cumulative)
+    return total, packages
+
+def measure(module, cwd=".", repeat=REPEAT):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")]))
+    best, packages = None, set()
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=cwd, env=env, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines()
+            return {"error": lines[-1] if lines else "failed"}
+        total, packages = parse_importtime(proc.stderr)
+        best = total if best is None else min(best, total)
+
+    return {
+        "import_ms": round(best / 1000, 1),
+        "forbidden": sorted(packages & set(MODULES[module])),
+    }
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    regressions = []
+    for module, result in results["modules"].items():
+        base = baseline.get("modules", {}).get(module, {})
+        if "import_ms" not in result or "import_ms" not in base:
+            continue
+        result["baseline_ms"] = base["import_ms"]
+        if (result["import_ms"] > base["import_ms"] * (1 + tolerance)
+                and result["import_ms"] - base["import_ms"] > MIN_REGRESSION_MS):
+            regressions.append(f"{module} ({result['import_ms']} ms, was {base['import_ms']} ms)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check import time and import footprint of the BoxOut entry points.")
+    parser.add_argument("--modules", nargs="+", choices=list(MODULES), default=list(MODULES))
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="imports per module; the fastest is kept")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "modules": {module: measure(module, repeat=args.repeat) for module in args.modules},
+    }
+
+    problems = [f"{module}: {r['error']}" for module, r in results["modules"].items() if "error" in r]
+    problems += [
+        f"{module} imports {', '.join(r['forbidden'])}"
+        for module, r in results["modules"].items() if r.get("forbidden")
+    ]
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            problems += [f"slower than baseline: {r}" for r in compare(results, json.load(f), args.tolerance)]
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
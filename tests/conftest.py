@@ -0,0 +1,25 @@
+import os
+import runpy
+import sys
+
+import pytest
+
+# the modules live at the repo root, not in a package
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+@pytest.fixture(scope="session")
+def season(tmp_path_factory):
+    """A short bench.py synthetic season, with the player and OSS caches built from it."""
+    import bench
+    from oss import build_oss_cache
+
+    data_dir = str(tmp_path_factory.mktemp("season"))
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(bench, "SEASON_DAYS", 45)
+        bench.generate_season(data_dir, scale=1)
+        mp.chdir(data_dir)
+        mp.setenv("BOXOUT_DATASET_DIR", data_dir)
+        runpy.run_path(os.path.join(REPO_DIR, "build_cache.py"), run_name="__main__")
+        build_oss_cache()
+    return data_dir
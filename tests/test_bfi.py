@@ -0,0 +1,99 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bfi import compute_bfi, load_injuries
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEAMS_FILE = os.path.join(REPO_DIR, "teams.json")
+
+def reference_bfi(nba_recent, injuries):
+    """The per-row loop BFI replaced, matching dates by calendar day and teams by simple name."""
+    lookup = nba_recent.set_index(['firstName', 'lastName', 'gameDate'])['avg_minutes'].to_dict()
+    scores = []
+    for _, row in nba_recent.iterrows():
+        team = row['playerteamName']
+        teammates = nba_recent[
+            (nba_recent['playerteamName'] == team) &
+            (nba_recent['position'].str.startswith(row['position'][0]))
+        ]
+        teammate_names = set(teammates['firstName'] + ' ' + teammates['lastName'])
+        injured = injuries[
+            (injuries['playerteamName'] == team) &
+            (injuries['STATUS'] == 'Out') &
+            (injuries['DATE'].dt.normalize() == row['gameDate'].normalize())
+        ]
+        total = 0.0
+        for name in set(injured['player_name']):
+            parts = name.split(' ')
+            if len(parts) < 2:
+                continue
+            key = (parts[0], ' '.join(parts[1:]), row['gameDate'])
+            if key in lookup and name in teammate_names:
+                total += lookup[key]
+        scores.append(total)
+    return pd.Series(scores, index=nba_recent.index)
+
+@pytest.fixture
+def season(tmp_path):
+    """Box-score rows for three teams and an injury report in the real file's format."""
+    rng = np.random.default_rng(0)
+    with open(TEAMS_FILE, "r") as f:
+        teams = {t["simpleName"]: t["teamName"] for t in json.load(f)}
+    # the real report spells the Clippers "LA Clippers"
+    teams["Clippers"] = "LA Clippers"
+    simple = ["Knicks", "Celtics", "Clippers"]
+
+    players = pd.DataFrame({
+        'firstName': [f"First{i}" for i in range(36)],
+        'lastName': [f"Last{i}" if i % 9 else f"Van Last{i}" for i in range(36)],
+        'playerteamName': np.repeat(simple, 12),
+        'position': rng.choice(["G", "G-F", "F", "F-C", "C"], 36),
+    })
+    days = pd.date_range("2024-11-01 19:30", periods=20)
+    nba = players.merge(pd.DataFrame({'gameDate': days}), how='cross')
+    nba = nba.sample(frac=0.7, random_state=0).sort_values(['firstName', 'lastName', 'gameDate'])
+    nba['avg_minutes'] = rng.uniform(5, 35, len(nba)).round(1)
+    nba.loc[nba.sample(frac=0.05, random_state=1).index, 'avg_minutes'] = np.nan
+
+    listed = nba.sample(frac=0.15, random_state=2)
+    report = pd.DataFrame({
+        'PLAYER': listed['lastName'] + ', ' + listed['firstName'],
+        'STATUS': rng.choice(['Out', 'Out', 'Questionable'], len(listed)),
+        'REASON': 'Injury/Illness',
+        'TEAM': listed['playerteamName'].map(teams),
+        'GAME': '',
+        'DATE': listed['gameDate'].dt.strftime('%m/%d/%Y'),
+    })
+    extra = pd.DataFrame({
+        'PLAYER': ['Nobody, Somebody', 'Mononym, ', 'Last3, First3'],
+        'STATUS': 'Out', 'REASON': 'Injury/Illness',
+        'TEAM': ['New York Knicks', 'Boston Celtics', 'New York Knicks'],
+        'GAME': '', 'DATE': days[:3].strftime('%m/%d/%Y'),
+    })
+    path = tmp_path / "injury_data.csv"
+    pd.concat([report, report.head(5), extra]).to_csv(path, index=False)
+    return nba, load_injuries(str(path), TEAMS_FILE)
+
+def test_injury_teams_map_to_box_score_names(season):
+    _, injuries = season
+    assert set(injuries['playerteamName']) == {"Knicks", "Celtics", "Clippers"}
+
+def test_matches_reference_loop(season):
+    nba, injuries = season
+    expected = reference_bfi(nba, injuries)
+
+    bfi = compute_bfi(nba, injuries)
+
+    assert (expected > 0).sum() > 20
+    # a listed teammate without an average makes the row NaN
+    assert expected.isna().any()
+    pd.testing.assert_series_equal(bfi, expected, check_names=False)
+
+def test_every_team_in_the_repo_injury_report_is_known():
+    injuries = load_injuries(os.path.join(REPO_DIR, "injury_data.csv"), TEAMS_FILE)
+    assert injuries['playerteamName'].notna().all()
+    assert injuries['playerteamName'].nunique() == 30
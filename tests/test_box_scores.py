@@ -0,0 +1,109 @@
+import os
+import sys
+import threading
+import types
+
+import pandas as pd
+import pytest
+
+import box_scores
+
+ROWS = pd.DataFrame({
+    'personId': [1, 2, 1, 2],
+    'firstName': ['Ann', 'Bo', 'Ann', 'Bo'],
+    'gameDate': ['2024-11-02', '2024-11-01', '2024-12-01', '2024-12-03'],
+    'points': [10, 12, 14, 16],
+})
+
+def write_csv(path, rows=ROWS, mtime=None):
+    rows.to_csv(path, index=False)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+@pytest.fixture
+def store_dir(tmp_path):
+    return str(tmp_path / "store")
+
+def test_store_is_fresh_for_the_csv_it_was_built_from(tmp_path, store_dir):
+    csv = write_csv(tmp_path / "stats.csv")
+    assert not box_scores.store_is_fresh(csv, store_dir)
+
+    box_scores.build_store(csv, store_dir)
+    assert box_scores.store_is_fresh(csv, store_dir)
+
+    write_csv(tmp_path / "stats.csv", ROWS.head(3))
+    assert not box_scores.store_is_fresh(csv, store_dir)
+
+def test_store_from_newer_download_is_kept(tmp_path, store_dir):
+    (tmp_path / "v1").mkdir()
+    (tmp_path / "v2").mkdir()
+    old = write_csv(tmp_path / "v1" / "stats.csv", ROWS.head(2), mtime=1_000_000)
+    new = write_csv(tmp_path / "v2" / "stats.csv", mtime=2_000_000)
+
+    box_scores.build_store(new, store_dir)
+    # a process still holding the old download must not rebuild over the newer store
+    assert box_scores.store_is_fresh(old, store_dir)
+    assert len(box_scores.load_box_scores(csv_path=old, store_dir=store_dir)) == len(ROWS)
+
+    box_scores.build_store(old, store_dir)
+    assert not box_scores.store_is_fresh(new, store_dir)
+
+def test_refresh_dataset_resolves_the_download_again(monkeypatch):
+    versions = iter(["/data/v1", "/data/v2"])
+    monkeypatch.setitem(sys.modules, "kagglehub", types.SimpleNamespace(dataset_download=lambda _: next(versions)))
+    monkeypatch.delenv(box_scores.DATASET_DIR_ENV, raising=False)
+    box_scores.refresh_dataset()
+
+    assert box_scores.dataset_path() == "/data/v1"
+    assert box_scores.dataset_path() == "/data/v1"
+    box_scores.refresh_dataset()
+    assert box_scores.dataset_path() == "/data/v2"
+    box_scores.refresh_dataset()
+
+def test_concurrent_builds_and_reads(tmp_path, store_dir):
+    csv = write_csv(tmp_path / "stats.csv")
+    box_scores.build_store(csv, store_dir)
+    errors = []
+
+    def build():
+        try:
+            for _ in range(5):
+                box_scores.build_store(csv, store_dir, chunksize=1)
+        except Exception as e:
+            errors.append(e)
+
+    def read():
+        try:
+            for _ in range(40):
+                assert len(box_scores.load_box_scores(csv_path=csv, store_dir=store_dir)) == len(ROWS)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=build) for _ in range(2)] + [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert box_scores.store_is_fresh(csv, store_dir)
+    # nothing left behind next to the store but the lock files
+    assert sorted(os.listdir(tmp_path)) == ["stats.csv", "store", "store.build.lock", "store.lock"]
+
+def test_stale_check_is_repeated_under_the_lock(tmp_path, store_dir, monkeypatch):
+    csv = write_csv(tmp_path / "stats.csv")
+    box_scores.build_store(csv, store_dir)
+    built = []
+    monkeypatch.setattr(box_scores, "_write_store", lambda *args: built.append(args))
+
+    # a builder that found the store stale before another build finished it
+    box_scores.build_store(csv, store_dir, only_if_stale=True)
+    assert built == []
+
+def test_leftovers_of_killed_builds_are_removed(tmp_path, store_dir):
+    csv = write_csv(tmp_path / "stats.csv")
+    (tmp_path / "store.tmp.abc123" / "_parts").mkdir(parents=True)
+
+    box_scores.build_store(csv, store_dir)
+    assert not (tmp_path / "store.tmp.abc123").exists()
@@ -0,0 +1,112 @@
+import os
+import pickle
+import time
+
+import pytest
+
+from cache import MISSING, FileCache, MemoryCache, memoize
+
+# long enough apart that file mtimes order the uses
+TICK = 0.02
+
+@pytest.fixture(params=["memory", "file"])
+def make_cache(request, tmp_path):
+    def make(maxsize=3, ttl=None):
+        if request.param == "memory":
+            return MemoryCache(maxsize=maxsize, ttl=ttl)
+        return FileCache(str(tmp_path / "cache"), maxsize=maxsize, ttl=ttl)
+    return make
+
+def test_get_returns_what_was_set(make_cache):
+    cache = make_cache()
+    assert cache.get("a") is MISSING
+    cache.set("a", {"rows": [1, 2]})
+    assert cache.get("a") == {"rows": [1, 2]}
+
+def test_least_recently_used_is_evicted(make_cache):
+    cache = make_cache(maxsize=3)
+    for key in "abc":
+        cache.set(key, key)
+        time.sleep(TICK)
+    # a hit makes "a" the most recently used
+    assert cache.get("a") == "a"
+    time.sleep(TICK)
+
+    cache.set("d", "d")
+
+    assert cache.get("b") is MISSING
+    assert [cache.get(key) for key in "acd"] == ["a", "c", "d"]
+    assert cache.stats()["size"] == 3
+
+def test_entry_expires_ttl_after_it_was_stored_even_when_hit(make_cache):
+    cache = make_cache(ttl=0.5)
+    cache.set("a", 1)
+
+    start = time.monotonic()
+    while time.monotonic() - start < 0.4:
+        assert cache.get("a") == 1
+        time.sleep(0.1)
+    time.sleep(0.2)
+
+    assert cache.get("a") is MISSING
+    assert cache.stats()["evictions"] == 1
+
+def test_no_ttl_never_expires(make_cache):
+    cache = make_cache(ttl=0)
+    cache.set("a", 1)
+    time.sleep(TICK)
+    assert cache.get("a") == 1
+
+def test_counters(make_cache):
+    cache = make_cache(maxsize=2)
+    cache.get("a")
+    for key in "abc":
+        cache.set(key, key)
+        time.sleep(TICK)
+    cache.get("b")
+    cache.get("c")
+    cache.get("a")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 2, 1)
+    assert stats["hit_rate"] == 0.5
+    assert (stats["size"], stats["maxsize"]) == (2, 2)
+
+def test_clear_keeps_counters(make_cache):
+    cache = make_cache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.clear()
+
+    assert cache.get("a") is MISSING
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["hits"] == 1
+
+def test_file_cache_is_shared_between_instances(tmp_path):
+    first = FileCache(str(tmp_path / "cache"))
+    second = FileCache(str(tmp_path / "cache"))
+    first.set("a", [1, 2, 3])
+    assert second.get("a") == [1, 2, 3]
+
+def test_file_cache_ignores_entries_without_store_time(tmp_path):
+    cache = FileCache(str(tmp_path / "cache"))
+    with open(os.path.join(cache.directory, "a.pkl"), "wb") as f:
+        pickle.dump("written by an older version", f)
+
+    assert cache.get("a") is MISSING
+    assert not os.path.exists(os.path.join(cache.directory, "a.pkl"))
+
+def test_memoize_keys_on_version_and_arguments(make_cache):
+    cache = make_cache(maxsize=10)
+    version = ["v1"]
+    calls = []
+
+    @memoize(cache, version=lambda: version[0])
+    def render(n, scale=1):
+        calls.append((n, scale))
+        return n * scale
+
+    assert [render(2), render(2), render(2, scale=3), render(2)] == [2, 2, 6, 2]
+    version[0] = "v2"
+    assert render(2) == 2
+    assert calls == [(2, 1), (2, 3), (2, 1)]
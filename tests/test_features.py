@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import MAX_LOG_SCALE, GroupLayout, ewm_features, rolling_features
+
+COLUMNS = ['fp', 'numMinutes']
+# the long groups run past one EWM block for spans 2 and 10
+GROUP_SIZES = [1, 2, 5, 17, 40, 1500, 3500]
+
+@pytest.fixture(scope="module")
+def games():
+    """Rows sorted by player, with about one value in seven missing."""
+    rng = np.random.default_rng(0)
+    player = np.repeat(np.arange(len(GROUP_SIZES)), GROUP_SIZES)
+    df = pd.DataFrame({
+        'personId': player,
+        'fp': rng.normal(30, 12, len(player)).round(1),
+        'numMinutes': rng.uniform(0, 40, len(player)).round(2),
+    })
+    for column in COLUMNS:
+        df.loc[rng.random(len(df)) < 0.15, column] = np.nan
+    # labels the kernels must carry through, not positions
+    df.index = rng.permutation(len(df)) * 3
+    return df
+
+def shifted(df, column):
+    return df.groupby('personId')[column].shift(1).groupby(df['personId'])
+
+def test_block_is_shorter_than_the_long_groups():
+    for span in [2, 10]:
+        assert int(MAX_LOG_SCALE / -np.log(1 - 2 / (span + 1))) < max(GROUP_SIZES)
+
+# windowed sums are differences of running totals, so small variances in
+# long groups carry their rounding
+TOLERANCE = {'mean': 1e-9, 'var': 1e-6, 'std': 1e-6}
+
+@pytest.mark.parametrize("window, min_periods", [(1, 1), (3, 1), (3, 3), (10, 1), (10, 3), (None, 1), (None, 3)])
+def test_rolling_matches_pandas(games, window, min_periods):
+    stats = ('mean', 'var', 'std')
+    result = rolling_features(
+        games, GroupLayout(games, ['personId']), COLUMNS, [window], stats=stats, min_periods=min_periods
+    )
+    label = "all" if window is None else window
+
+    for column in COLUMNS:
+        history = shifted(games, column)
+        if window is None:
+            frames = history.expanding(min_periods=min_periods)
+        else:
+            frames = history.rolling(window, min_periods=min_periods)
+        for stat in stats:
+            expected = getattr(frames, stat)().reset_index(level=0, drop=True).reindex(games.index)
+            pd.testing.assert_series_equal(
+                result[f"{column}_{stat}_{label}"], expected, check_names=False, rtol=1e-9, atol=TOLERANCE[stat]
+            )
+
+def test_prior_carries_earlier_games_into_expanding_stats(games):
+    stats = ('mean', 'var', 'std')
+    whole = rolling_features(games, GroupLayout(games, ['personId']), COLUMNS, [None], stats=stats)
+
+    position = games.groupby('personId').cumcount()
+    earlier, later = games[position < 20], games[position >= 20]
+    totals = earlier.groupby('personId')[COLUMNS].agg(['sum', 'count'])
+    squares = (earlier[COLUMNS] ** 2).groupby(earlier['personId']).sum()
+    prior = pd.DataFrame({
+        **{f"{column}_{field}": totals[(column, field)] for column in COLUMNS for field in ['sum', 'count']},
+        **{f"{column}_sumsq": squares[column] for column in COLUMNS},
+    })
+    prior = prior.reindex(later['personId']).set_axis(later.index)
+
+    carried = rolling_features(later, GroupLayout(later, ['personId']), COLUMNS, [None], stats=stats, prior=prior)
+
+    pd.testing.assert_frame_equal(carried, whole.loc[later.index], rtol=1e-9, atol=1e-6)
+
+@pytest.mark.parametrize("span", [2, 5, 10, 30])
+def test_ewm_matches_pandas(games, span):
+    result = ewm_features(games, GroupLayout(games, ['personId']), COLUMNS, [span])
+
+    for column in COLUMNS:
+        expected = (
+            shifted(games, column).ewm(span=span, adjust=True).mean()
+            .reset_index(level=0, drop=True).reindex(games.index)
+        )
+        values = result[f"{column}_ewm_{span}"]
+        assert np.isfinite(values[expected.notna()]).all()
+        pd.testing.assert_series_equal(values, expected, check_names=False, rtol=1e-10, atol=1e-10)
+
+def test_empty_frame():
+    empty = pd.DataFrame({'personId': [], 'fp': [], 'numMinutes': []})
+    layout = GroupLayout(empty, ['personId'])
+
+    assert rolling_features(empty, layout, COLUMNS, [3, None], stats=('mean', 'std')).empty
+    assert ewm_features(empty, layout, COLUMNS, [5]).empty
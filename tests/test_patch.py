@@ -0,0 +1,151 @@
+import threading
+import time
+
+import pytest
+
+from patch import UNKNOWN, Journal, TokenBucket, backfill_positions
+
+FAST = dict(rate=1000, max_workers=1, backoff=0)
+
+class Interrupted(BaseException):
+    """Stands in for a Ctrl-C or a killed worker: not caught by the retry loop."""
+
+class FakeFetch:
+    """fetch() stub: POSITION strings by player id, recording every call."""
+
+    def __init__(self, positions, fail=(), fail_times=None, interrupt_at=None):
+        self.positions = positions
+        self.fail = set(fail)
+        self.fail_times = dict(fail_times or {})
+        self.interrupt_at = interrupt_at
+        self.interrupted = False
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, player_id):
+        with self.lock:
+            self.calls.append((player_id, time.monotonic()))
+            # once interrupted, the process is gone: nothing after it gets through
+            if player_id == self.interrupt_at or self.interrupted:
+                self.interrupted = True
+                raise Interrupted()
+            if player_id in self.fail:
+                raise ConnectionError("timed out")
+            if self.fail_times.get(player_id, 0) > 0:
+                self.fail_times[player_id] -= 1
+                raise ConnectionError("timed out")
+        return self.positions[player_id]
+
+    def ids(self):
+        return [player_id for player_id, _ in self.calls]
+
+def lookup(*names):
+    return {name: {"position": None} for name in names}
+
+IDS = {"Ann": 1, "Bo": 2, "Cy": 3, "Di": 4}
+POSITIONS = {1: "Guard", 2: "Forward-Center", 3: "Center", 4: "Guard-Forward"}
+
+@pytest.fixture
+def journal(tmp_path):
+    return Journal(str(tmp_path / "backfill.jsonl"))
+
+def test_token_bucket_spaces_acquisitions():
+    bucket = TokenBucket(rate=50)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # the first token is free, the other five wait 1/50 s each
+    assert time.monotonic() - start >= 5 / 50 * 0.95
+
+def test_backfill_stays_under_rate_across_workers(journal):
+    fetch = FakeFetch(POSITIONS)
+    players = lookup(*IDS)
+
+    backfill_positions(players, IDS, fetch=fetch, journal=journal, rate=20, max_workers=4, backoff=0)
+
+    times = sorted(t for _, t in fetch.calls)
+    assert len(times) == 4
+    assert times[-1] - times[0] >= 3 / 20 * 0.95
+
+def test_fills_missing_positions_and_journals_them(journal):
+    fetch = FakeFetch(POSITIONS)
+    players = lookup(*IDS)
+    players["Ann"]["position"] = "G"
+
+    updated = backfill_positions(players, IDS, fetch=fetch, journal=journal, **FAST)
+
+    assert sorted(updated) == ["Bo", "Cy", "Di"]
+    assert 1 not in fetch.ids()
+    assert [players[name]["position"] for name in IDS] == ["G", "F-C", "C", "G-F"]
+    assert journal.read() == {"Bo": "F-C", "Cy": "C", "Di": "G-F"}
+
+def test_resumes_from_journal_after_interruption(journal):
+    first = FakeFetch(POSITIONS, interrupt_at=3)
+    with pytest.raises(Interrupted):
+        backfill_positions(lookup(*IDS), IDS, fetch=first, journal=journal, **FAST)
+    assert journal.read() == {"Ann": "G", "Bo": "F-C"}
+
+    # the cache on disk was never written, so the next run starts from it again
+    second = FakeFetch(POSITIONS)
+    players = lookup(*IDS)
+    updated = backfill_positions(players, IDS, fetch=second, journal=journal, **FAST)
+
+    assert second.ids() == [3, 4]
+    assert sorted(updated) == ["Ann", "Bo", "Cy", "Di"]
+    assert [players[name]["position"] for name in IDS] == ["G", "F-C", "C", "G-F"]
+
+def test_resume_ignores_torn_last_line(journal):
+    journal.append("Ann", "G")
+    with open(journal.path, "a") as f:
+        f.write('{"name": "Bo", "posi')
+
+    assert journal.read() == {"Ann": "G"}
+
+def test_retries_transient_failures(journal):
+    fetch = FakeFetch(POSITIONS, fail_times={2: 2})
+    players = lookup("Bo")
+
+    updated = backfill_positions(players, IDS, fetch=fetch, journal=journal, max_retries=3, **FAST)
+
+    assert updated == ["Bo"]
+    assert fetch.ids() == [2, 2, 2]
+    assert players["Bo"]["position"] == "F-C"
+
+def test_gives_up_after_max_retries_without_journaling(journal):
+    fetch = FakeFetch(POSITIONS, fail={2})
+    players = lookup("Ann", "Bo")
+
+    updated = backfill_positions(players, IDS, fetch=fetch, journal=journal, max_retries=2, **FAST)
+
+    assert updated == ["Ann"]
+    assert fetch.ids().count(2) == 3
+    assert players["Bo"]["position"] is None
+    # a failed fetch is retried by the next run, not remembered
+    assert "Bo" not in journal.read()
+
+def test_unmappable_position_is_journaled_and_skipped(journal):
+    fetch = FakeFetch({**POSITIONS, 3: ""})
+    players = lookup("Ann", "Cy")
+
+    updated = backfill_positions(players, IDS, fetch=fetch, journal=journal, **FAST)
+
+    assert updated == ["Ann"]
+    assert players["Cy"]["position"] is None
+    assert journal.read()["Cy"] == UNKNOWN
+
+    again = FakeFetch(POSITIONS)
+    players = lookup("Ann", "Cy")
+    backfill_positions(players, IDS, fetch=again, journal=journal, **FAST)
+
+    assert again.ids() == []
+    assert players["Cy"]["position"] is None
+
+def test_clear_keeps_unknown_records(journal):
+    journal.append("Ann", "G")
+    journal.append("Cy", UNKNOWN)
+
+    journal.clear(keep_unknown=True)
+    assert journal.read() == {"Cy": UNKNOWN}
+
+    journal.clear()
+    assert journal.read() == {}
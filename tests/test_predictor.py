@@ -0,0 +1,58 @@
+import json
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import process_model_data
+from predictor import Predictor
+
+INPUTS = ["player_lookup_cache.json", "opponent_strength_cache.json", "injury_data.csv", "teams.json"]
+
+@pytest.fixture
+def training_data(season, tmp_path, monkeypatch):
+    """model_training_data.csv for the season, built in a fresh working directory."""
+    for name in INPUTS:
+        shutil.copy(os.path.join(season, name), tmp_path)
+    os.symlink(os.path.join(season, "models"), tmp_path / "models")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("BOXOUT_DATASET_DIR", season)
+    process_model_data.build_full()
+    return pd.read_csv(process_model_data.OUTPUT_FILE)
+
+def test_namesakes_are_predicted_separately(training_data):
+    today = pd.Timestamp.today().normalize()
+    predictions = Predictor().predict_range(today, today + pd.Timedelta(days=6))
+    # two players on teams that play on the same day
+    day, games = next(iter(predictions.groupby('game_day')))
+    first, second = games.drop_duplicates('playerteamName').head(2)[['personId', 'firstName', 'lastName']].values
+
+    renamed = training_data.copy()
+    renamed.loc[renamed['personId'] == second[0], ['firstName', 'lastName']] = first[1:]
+    renamed.to_csv(process_model_data.OUTPUT_FILE, index=False)
+
+    with open("player_lookup_cache.json", "r") as f:
+        cache = {int(entry["player_id"]): entry for entry in json.load(f).values()}
+    namesakes = Predictor().predict_range(day, day)
+    namesakes = namesakes[(namesakes['firstName'] == first[1]) & (namesakes['lastName'] == first[2])]
+
+    assert sorted(namesakes['personId']) == sorted([first[0], second[0]])
+    # each keeps their own image and position from the player dimension
+    for _, row in namesakes.iterrows():
+        assert row['image_url'] == cache[row['personId']]['image_url']
+        assert row['position'] == cache[row['personId']]['position']
+
+def test_players_filter_takes_person_ids(training_data):
+    today = pd.Timestamp.today().normalize()
+    predictor = Predictor()
+    everyone = predictor.predict_range(today, today + pd.Timedelta(days=6))
+    wanted = set(everyone['personId'].drop_duplicates().head(3))
+
+    picked = predictor.predict_range(today, today + pd.Timedelta(days=6), players=wanted)
+
+    assert set(picked['personId']) == wanted
+    pd.testing.assert_frame_equal(
+        picked.reset_index(drop=True),
+        everyone[everyone['personId'].isin(wanted)].reset_index(drop=True),
+    )
@@ -0,0 +1,52 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from tracing import TRACE_ENV, current_span, traced
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setenv(TRACE_ENV, str(path))
+
+    def records():
+        with open(path, "r") as f:
+            return {record["stage"]: record for record in map(json.loads, f)}
+    return records
+
+def test_rows_default_to_the_returned_length(trace_file):
+    @traced()
+    def head(rows):
+        return rows[:3]
+
+    head(np.arange(10))
+    assert trace_file()["head"]["rows"] == 3
+
+def test_a_stage_can_report_the_rows_it_read(trace_file):
+    @traced()
+    def total(rows):
+        current_span().rows = len(rows)
+        return np.array([rows.sum()])
+
+    total(np.arange(10))
+    assert trace_file()["total"]["rows"] == 10
+
+def test_current_span_outside_a_stage_is_detached():
+    current_span().rows = 5
+    assert current_span().rows is None
+
+def test_bucket_games_reports_the_games_it_read(season, tmp_path, monkeypatch, trace_file):
+    from oss import build_oss_cache
+
+    shutil.copy(os.path.join(season, "player_lookup_cache.json"), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("BOXOUT_DATASET_DIR", season)
+    build_oss_cache()
+
+    records = trace_file()
+    games = records["build_oss_cache/load_games"]["rows"]
+    assert games > 0
+    assert records["build_oss_cache/bucket_games"]["rows"] == games
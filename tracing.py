@@ -0,0 +1,187 @@
+import atexit
+import cProfile
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# STAGE TRACING
+#
+# `with stage("load_games") as span:` (or `@traced()`) times a block of a
+# script and records its row count and memory change (inside a traced
+# function, current_span() is its span). Nested stages are recorded as
+# "outer/inner". Nothing is kept unless one of the env vars below is set:
+#   BOXOUT_TRACE=path       append one JSON line per finished stage ("1" for TRACE_FILE)
+#   BOXOUT_PROMETHEUS=path  write Prometheus text for the run at exit (textfile
+#                           collector); "{script}" in the path is the script name
+#   BOXOUT_PROFILE=dir      dump a cProfile .prof per top-level stage into dir
+
+TRACE_ENV = "BOXOUT_TRACE"
+PROMETHEUS_ENV = "BOXOUT_PROMETHEUS"
+PROFILE_ENV = "BOXOUT_PROFILE"
+TRACE_FILE = "pipeline_trace.jsonl"
+
+SCRIPT = os.path.splitext(os.path.basename(sys.argv[0] or ""))[0].lstrip("-") or "python"
+RUN_ID = f"{SCRIPT}-{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+
+_local = threading.local()
+_lock = threading.Lock()
+_totals = {}  # stage path -> aggregated numbers for the Prometheus output
+
+def rss_mb():
+    """Current resident set size in MB."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return peak_rss_mb()
+
+def peak_rss_mb():
+    """This process's peak resident set size in MB."""
+    # VmHWM is this process's own peak; ru_maxrss on Linux carries over the
+    # parent's peak across fork, so it is only the fallback (KiB, bytes on macOS)
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2**20 if sys.platform == "darwin" else 1024)
+
+def _trace_path():
+    path = os.environ.get(TRACE_ENV)
+    return TRACE_FILE if path == "1" else path
+
+def enabled():
+    return bool(os.environ.get(TRACE_ENV) or os.environ.get(PROMETHEUS_ENV) or os.environ.get(PROFILE_ENV))
+
+class Span:
+    """One timed stage; set .rows inside the block once the row count is known."""
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+def current_span():
+    """The innermost open stage's span (a detached one when tracing is off)."""
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else Span(None)
+
+@contextmanager
+def stage(name, rows=None):
+    span = Span(name, rows)
+    if not enabled():
+        yield span
+        return
+
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    path = "/".join([s.name for s in stack] + [name])
+
+    # one profiler at a time: only the outermost stage is profiled
+    profile_dir = os.environ.get(PROFILE_ENV)
+    profiler = cProfile.Profile() if profile_dir and not stack else None
+
+    stack.append(span)
+    rss_before = rss_mb()
+    started = datetime.now()
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield span
+    finally:
+        if profiler:
+            profiler.disable()
+        wall = time.perf_counter() - start
+        stack.pop()
+        record = {
+            "run": RUN_ID,
+            "script": SCRIPT,
+            "stage": path,
+            "start": started.isoformat(timespec="milliseconds"),
+            "wall_s": round(wall, 6),
+            "rows": span.rows,
+            "rows_per_s": round(span.rows / wall, 1) if span.rows is not None and wall > 0 else None,
+            "rss_delta_mb": round(rss_mb() - rss_before, 2),
+            "peak_rss_mb": round(peak_rss_mb(), 2),
+        }
+        _record(record)
+        if profiler:
+            os.makedirs(profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(profile_dir, f"{RUN_ID}.{path.replace('/', '.')}.prof"))
+
+def traced(name=None):
+    """Decorator form of stage(), named after the function by default.
+
+    When the function returns a frame or array its length is the row count,
+    unless the function set current_span().rows itself (aggregating stages
+    report the rows they read, not the groups they return).
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name or func.__name__) as span:
+                result = func(*args, **kwargs)
+                if span.rows is None and hasattr(result, "shape"):
+                    span.rows = len(result)
+                return result
+        return wrapper
+    return decorate
+
+def _record(record):
+    with _lock:
+        totals = _totals.setdefault(record["stage"], {"calls": 0, "seconds": 0.0, "rows": 0, "peak_rss_mb": 0.0})
+        totals["calls"] += 1
+        totals["seconds"] += record["wall_s"]
+        totals["rows"] += record["rows"] or 0
+        totals["peak_rss_mb"] = max(totals["peak_rss_mb"], record["peak_rss_mb"])
+        totals["last_seconds"] = record["wall_s"]
+        totals["rss_delta_mb"] = record["rss_delta_mb"]
+
+        path = _trace_path()
+        if path:
+            with open(path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+def prometheus_text():
+    """Every stage recorded so far as Prometheus text exposition format."""
+    metrics = [
+        ("boxout_stage_calls_total", "counter", "Times the stage ran.", "calls", 1),
+        ("boxout_stage_seconds_total", "counter", "Wall time spent in the stage.", "seconds", 1),
+        ("boxout_stage_last_seconds", "gauge", "Wall time of the stage's last run.", "last_seconds", 1),
+        ("boxout_stage_rows_total", "counter", "Rows the stage reported handling.", "rows", 1),
+        ("boxout_stage_rss_delta_bytes", "gauge", "RSS change over the stage's last run.", "rss_delta_mb", 2**20),
+        ("boxout_stage_peak_rss_bytes", "gauge", "Process peak RSS when the stage finished.", "peak_rss_mb", 2**20),
+    ]
+    with _lock:
+        totals = {path: dict(values) for path, values in _totals.items()}
+
+    lines = []
+    for metric, kind, help_text, field, scale in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for path, values in sorted(totals.items()):
+            lines.append(f'{metric}{{script="{SCRIPT}",stage="{path}"}} {values[field] * scale:g}')
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path):
+    # written whole and swapped in, as the textfile collector expects
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_file, path)
+
+@atexit.register
+def _write_prometheus_at_exit():
+    path = os.environ.get(PROMETHEUS_ENV)
+    if path and _totals:
+        write_prometheus(path.replace("{script}", SCRIPT))